@@ -0,0 +1,30 @@
+"""
+Pages of the Streamlit app. app.py builds the navigation from page(); a
+page's module is imported the first time it is shown, and its render()
+draws it on every run.
+"""
+import importlib
+import os
+
+import streamlit as st
+
+import metrics
+from database import init_db
+
+# Defined here rather than in app.py, which re-executes on every run: a
+# cached function is looked up by its source, which st.cache_resource
+# would otherwise re-read each time.
+@st.cache_resource(show_spinner=False)
+def setup():
+    """Shared setup, once per process."""
+    # Apply schema migrations
+    init_db()
+    # HEALTHMATE_METRICS_PORT serves Prometheus metrics at http://127.0.0.1:<port>/metrics
+    if os.environ.get('HEALTHMATE_METRICS_PORT'):
+        metrics.start_http_server(int(os.environ['HEALTHMATE_METRICS_PORT']))
+
+def page(module, title, default=False):
+    """st.Page for app_pages.<module>, imported on its first visit."""
+    def run():
+        importlib.import_module(f"{__name__}.{module}").render()
+    return st.Page(run, title=title, url_path=module, default=default)
@@ -0,0 +1,95 @@
+import datetime
+import io
+
+import pandas as pd
+import streamlit as st
+
+from bmi import CATEGORIES, RECOMMENDATIONS, compute_bmi
+from bmi_batch import screen_roster
+from database import save_measurements, update_profile
+
+# How each BMI category is shown, by category code
+CATEGORY_ALERTS = (st.error, st.warning, st.success, st.warning, st.error)
+
+# Screen a clinic roster with the batch engine; the scored file is built
+# chunk by chunk with a progress bar, then offered for download
+def roster_section():
+    uploaded = st.file_uploader("Roster CSV", type=["csv"], key="bmi_roster")
+    st.caption("Needs height (cm) and weight (kg) columns; age and gender columns are optional. "
+               "All columns are kept in the result.")
+    if uploaded is not None and st.button("Screen roster", key="bmi_roster_screen"):
+        size = max(uploaded.size, 1)
+        progress = st.progress(0.0, text="Screening...")
+        scored = io.BytesIO()
+        result = None
+        try:
+            for result in screen_roster(uploaded, scored):
+                progress.progress(min(uploaded.tell() / size, 1.0), text=f"Screened {result.rows:,} people...")
+        except ValueError as e:
+            st.error(f"Could not screen the roster: {e}")
+            return
+        progress.progress(1.0, text="Done")
+        if result is None:
+            st.warning("The roster has no rows.")
+            return
+        st.dataframe(pd.DataFrame({
+            "Category": CATEGORIES + ("No usable height/weight",),
+            "People": result.counts,
+            "Share": [f"{count / result.rows:.1%}" for count in result.counts],
+        }), hide_index=True)
+        st.download_button("Download screened roster", scored.getvalue(),
+                           file_name=f"screened-{uploaded.name}", mime="text/csv")
+
+def render():
+    st.subheader("BMI Calculator")
+    st.info("Calculate your Body Mass Index and get personalized health recommendations.")
+    
+    # Input method selection
+    input_method = st.radio("Select input method:", ["Sliders", "Manual Input", "Roster (CSV)"])
+    
+    if input_method == "Roster (CSV)":
+        roster_section()
+    else:
+        if input_method == "Sliders":
+            col1, col2 = st.columns(2)
+            with col1:
+                height = st.slider("Height (cm)", 100, 250, 170)
+            with col2:
+                weight = st.slider("Weight (kg)", 30, 200, 70)
+        else:
+            col1, col2 = st.columns(2)
+            with col1:
+                height = st.number_input("Height (cm)", min_value=100.0, max_value=250.0, value=170.0, step=0.1)
+            with col2:
+                weight = st.number_input("Weight (kg)", min_value=30.0, max_value=200.0, value=65.0, step=0.1)
+        
+        # Additional information
+        age = st.slider("Age", 1, 100, 30)
+        gender = st.radio("Gender", ["Male", "Female"])
+        
+        if st.button("Calculate BMI"):
+            # The same engine that screens whole rosters, with one person
+            result = compute_bmi(height, weight, age, gender)
+            category = int(result.category)
+            if category >= 0:
+                bmi = float(result.bmi)
+                st.metric("Your BMI", f"{bmi:.2f}")
+                
+                # Keep the result for the Vitals charts, and the height for next time
+                now = int(datetime.datetime.now(datetime.timezone.utc).timestamp())
+                save_measurements(st.session_state.user_id, [("weight", now, weight), ("bmi", now, bmi)])
+                update_profile(st.session_state.user_id, height=height)
+                
+                # Detailed classification and recommendations
+                advice, age_advice, gender_advice = RECOMMENDATIONS[int(result.recommendation)]
+                CATEGORY_ALERTS[category](CATEGORIES[category])
+                st.info("**Recommendations:**\n" + "".join(f"\n- {line}" for line in advice))
+                
+                # Add age and gender-based recommendations
+                st.markdown("---")
+                st.subheader("Personalized Recommendations")
+                st.info(age_advice)
+                if gender_advice:
+                    st.info(gender_advice)
+            else:
+                st.error("Please enter valid height and weight values")
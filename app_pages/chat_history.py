@@ -0,0 +1,39 @@
+import streamlit as st
+
+from database import get_chat_history_page, search_chat_history
+from app_pages.history import export_section, load_history, load_more
+
+def render():
+    st.subheader("Chat History")
+    
+    query = st.text_input("Search your conversations", placeholder="e.g. migraine")
+    
+    if query:
+        results = search_chat_history(st.session_state.user_id, query)
+        if results:
+            st.caption(f"{len(results)} best matches")
+            for user_msg, bot_resp, timestamp, snippet in results:
+                with st.expander(f"{timestamp} - {user_msg[:50]}..."):
+                    st.markdown(f"…{snippet}…")
+                    st.markdown("---")
+                    st.markdown(f"**You:** {user_msg}")
+                    st.markdown(f"**HealthMate:** {bot_resp}")
+        else:
+            st.info("No conversations match your search")
+    else:
+        history, cursor = load_history(get_chat_history_page, st.session_state.user_id, "chat_history_pages")
+        
+        if history:
+            # Newest first, with older conversations loaded further down
+            for user_msg, bot_resp, timestamp in history:
+                with st.expander(f"{timestamp} - {user_msg[:50]}..."):
+                    st.markdown(f"**You:** {user_msg}")
+                    st.markdown(f"**HealthMate:** {bot_resp}")
+            if cursor:
+                st.button("Load older conversations", on_click=load_more, args=("chat_history_pages",))
+        else:
+            st.info("No chat history yet")
+    
+    st.markdown("---")
+    st.subheader("Export")
+    export_section("chat_history", "chat history")
@@ -0,0 +1,18 @@
+import streamlit as st
+
+from database import save_chat_history
+from models import generate_health_tip
+
+def render():
+    st.subheader("Daily Health Tips")
+    
+    if st.button("Get Today's Tip"):
+        tip = generate_health_tip()
+        st.info(tip)
+        
+        # Save to chat history
+        save_chat_history(
+            st.session_state.user_id, 
+            "Requested daily health tip", 
+            f"Today's tip: {tip}"
+        )
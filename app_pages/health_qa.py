@@ -0,0 +1,33 @@
+import streamlit as st
+
+import response_cache
+from database import save_chat_history
+from models import ask_healthmate_stream
+
+COMMON_SYMPTOMS = ("Fever", "Headache", "Cough", "Sore throat", "Fatigue", "Nausea", "Other")
+
+# Share answers to (near-)identical questions across reruns and processes
+if response_cache.ENABLED:
+    response_cache.enable()
+
+def render():
+    st.subheader("Health Q&A Assistant")
+    st.info("Describe your symptoms or health concerns, and I'll provide general advice.")
+    
+    # Symptom selector
+    selected_symptom = st.selectbox("Select your main symptom:", COMMON_SYMPTOMS)
+    
+    # Detailed description
+    if selected_symptom == "Other":
+        user_input = st.text_area("Please describe your symptoms in detail:", height=100)
+    else:
+        user_input = st.text_area(f"Please describe your {selected_symptom.lower()} in detail:", height=100)
+    
+    if st.button("Get Advice"):
+        if user_input:
+            st.success("Here's my advice based on your symptoms:")
+            # Stream the answer as it is generated, then save the full text
+            response = st.write_stream(ask_healthmate_stream(user_input))
+            save_chat_history(st.session_state.user_id, user_input, response)
+        else:
+            st.warning("Please describe your symptoms.")
@@ -0,0 +1,31 @@
+import streamlit as st
+
+from database import EXPORT_FORMATS, MEDIA_TYPES, export_history, export_filename
+
+# Load the pages of a history list the user has scrolled through so far.
+# Each page is a keyset seek, so deep pages cost the same as the first one.
+def load_history(fetch_page, user_id, state_key):
+    pages = st.session_state.get(state_key, 1)
+    rows, cursor = [], None
+    for _ in range(pages):
+        page, cursor = fetch_page(user_id, cursor)
+        rows.extend(page)
+        if cursor is None:
+            break
+    return rows, cursor
+
+def load_more(state_key):
+    st.session_state[state_key] = st.session_state.get(state_key, 1) + 1
+
+# Offer the user's whole history as a file. st.download_button needs the
+# file up front, so it is only built when asked for, streamed chunk by chunk.
+def export_section(table, label):
+    fmt = st.selectbox("Format", EXPORT_FORMATS, format_func=str.upper, key=f"{table}_export_format")
+    if st.button(f"Prepare {label} export", key=f"{table}_export"):
+        user_id = st.session_state.user_id
+        st.download_button(
+            f"Download {label} ({fmt.upper()})",
+            b"".join(export_history(table, fmt, user_id=user_id)),
+            file_name=export_filename(table, fmt, user_id),
+            mime=MEDIA_TYPES[fmt],
+        )
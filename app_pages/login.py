@@ -0,0 +1,27 @@
+import streamlit as st
+
+from database import verify_user
+from passwords import HashingBusyError
+
+def render():
+    st.subheader("User Login")
+    
+    with st.form("login_form"):
+        username = st.text_input("Username")
+        password = st.text_input("Password", type="password")
+        submitted = st.form_submit_button("Login")
+        
+        if submitted:
+            try:
+                user_id = verify_user(username, password)
+            except HashingBusyError:
+                st.warning("The server is busy, please try again in a moment")
+                st.stop()
+            if user_id:
+                st.session_state.user = username
+                st.session_state.user_id = user_id
+                st.success("Login successful!")
+                # The rerun shows the pages for logged-in users
+                st.rerun()
+            else:
+                st.error("Invalid username or password")
@@ -0,0 +1,37 @@
+import re
+
+import streamlit as st
+
+from database import create_user
+from passwords import HashingBusyError
+
+# All fields left-aligned in single column
+def render():
+    st.subheader("User Registration")
+    
+    # All fields in a single column, left-aligned
+    username = st.text_input("Username", key="reg_username")
+    email = st.text_input("Email", key="reg_email")
+    password = st.text_input("Password", type="password", key="reg_password")
+    confirm_password = st.text_input("Confirm Password", type="password", key="reg_confirm")
+    
+    # Register button
+    submitted = st.button("Register", use_container_width=True)
+    
+    if submitted:
+        if not username or not email or not password:
+            st.error("Please fill in all fields")
+        elif password != confirm_password:
+            st.error("Passwords do not match")
+        elif not re.match(r"[^@]+@[^@]+\.[^@]+", email):
+            st.error("Please enter a valid email address")
+        else:
+            try:
+                created = create_user(username, email, password)
+            except HashingBusyError:
+                st.warning("The server is busy, please try again in a moment")
+                st.stop()
+            if created:
+                st.success("Registration successful! Please login")
+            else:
+                st.error("Username or email already exists")
@@ -0,0 +1,105 @@
+import datetime
+
+import pandas as pd
+import streamlit as st
+
+from database import save_symptom_record, get_symptom_history_page, get_symptom_rollups
+from symptom_import import SYMPTOMS, ImportFormatError, import_symptom_file
+from trends import build_trends, daily_mean, rolling_mean, weekly
+from app_pages.history import export_section, load_history, load_more
+
+# Bulk import from another tracker or a wearable's export. Records are
+# committed chunk by chunk, so the progress bar tracks what is saved.
+def import_section():
+    uploaded = st.file_uploader("CSV or JSON export", type=["csv", "json", "jsonl"], key="symptom_import_file")
+    st.caption("Needs symptom, severity (1-10) and date columns; a notes column is optional. "
+               "Times without a time zone are read as UTC.")
+    if uploaded is not None and st.button("Import records", key="symptom_import"):
+        size = max(uploaded.size, 1)
+        progress = st.progress(0.0, text="Importing...")
+        result = None
+        try:
+            for result in import_symptom_file(st.session_state.user_id, uploaded, uploaded.name):
+                progress.progress(min(uploaded.tell() / size, 1.0), text=f"Imported {result.imported:,} records...")
+        except ImportFormatError as e:
+            st.error(f"Import stopped: {e}")
+            return
+        progress.progress(1.0, text="Done")
+        if result is None:
+            st.warning("The file has no records.")
+            return
+        st.success(f"Imported {result.imported:,} of {result.read:,} records.")
+        if result.rejected:
+            st.warning(f"Skipped {result.rejected:,} records: " + ", ".join(
+                f"{reason} ({count:,})" for reason, count in result.reasons.items()))
+
+def render():
+    st.subheader("Symptom Tracker")
+    st.info("Track your symptoms over time to identify patterns and share with your healthcare provider.")
+    
+    with st.form("symptom_form"):
+        symptom = st.selectbox("Symptom", SYMPTOMS)
+        severity = st.slider("Severity (1-10)", 1, 10, 5)
+        notes = st.text_area("Additional notes")
+        submitted = st.form_submit_button("Record Symptom")
+        
+        if submitted:
+            save_symptom_record(st.session_state.user_id, symptom, severity, notes)
+            st.success("Symptom recorded successfully!")
+    
+    with st.expander("Import records from another app"):
+        import_section()
+    
+    st.markdown("---")
+    st.subheader("Severity Trends")
+    
+    # Charts read the per-day rollups, never the raw records
+    period = st.selectbox("Period", [30, 90, 365], format_func=lambda days: f"Last {days} days")
+    end_day = datetime.datetime.utcnow().date()  # recorded_at is stored in UTC
+    start_day = end_day - datetime.timedelta(days=period - 1)
+    rollups = get_symptom_rollups(st.session_state.user_id, start_day.isoformat(), end_day.isoformat())
+    trends = build_trends(rollups, start_day, end_day)
+    
+    if trends.symptoms:
+        trend_symptom = st.selectbox("Symptom to chart", trends.symptoms)
+        i = trends.symptoms.index(trend_symptom)
+        st.caption("Daily severity")
+        st.line_chart(pd.DataFrame({
+            "Daily average": daily_mean(trends)[i],
+            "Daily max": trends.peak[i],
+            "7-day rolling average": rolling_mean(trends, 7)[i],
+        }, index=trends.days))
+        
+        week_starts, week_mean, week_peak = weekly(trends)
+        st.caption("Weekly severity")
+        st.line_chart(pd.DataFrame({
+            "Weekly average": week_mean[i],
+            "Weekly max": week_peak[i],
+        }, index=week_starts))
+    else:
+        st.info("No symptoms recorded in this period.")
+    
+    st.markdown("---")
+    st.subheader("Symptom History")
+    
+    history, cursor = load_history(get_symptom_history_page, st.session_state.user_id, "symptom_history_pages")
+    if history:
+        for symptom, severity, notes, recorded_at in history:
+            with st.expander(f"{recorded_at} - {symptom} (Severity: {severity}/10)"):
+                if notes:
+                    st.write(f"Notes: {notes}")
+                # Display different colors based on severity
+                if severity >= 7:
+                    st.error("High severity - consider consulting a healthcare provider")
+                elif severity >= 4:
+                    st.warning("Moderate severity - monitor closely")
+                else:
+                    st.success("Low severity")
+        if cursor:
+            st.button("Load older records", on_click=load_more, args=("symptom_history_pages",))
+    else:
+        st.info("No symptom records yet. Start tracking your symptoms above.")
+    
+    st.markdown("---")
+    st.subheader("Export for Your Doctor")
+    export_section("symptom_records", "symptom log")
@@ -0,0 +1,60 @@
+import datetime
+
+import pandas as pd
+import streamlit as st
+
+from database import MEASUREMENT_METRICS, bucket_width, save_measurements, get_measurement_buckets, get_latest_measurements
+
+def render():
+    st.subheader("Vitals")
+    st.info("Log your measurements and follow how they change over time.")
+    
+    with st.form("measurement_form"):
+        col1, col2 = st.columns(2)
+        with col1:
+            weight = st.number_input("Weight (kg)", min_value=20.0, max_value=300.0, value=None, step=0.1)
+            bp_systolic = st.number_input("Systolic blood pressure (mmHg)", min_value=50, max_value=250, value=None)
+            bp_diastolic = st.number_input("Diastolic blood pressure (mmHg)", min_value=30, max_value=150, value=None)
+        with col2:
+            heart_rate = st.number_input("Heart rate (bpm)", min_value=20, max_value=250, value=None)
+            blood_sugar = st.number_input("Blood sugar (mg/dL)", min_value=20, max_value=600, value=None)
+        submitted = st.form_submit_button("Save Measurements")
+        
+        if submitted:
+            now = int(datetime.datetime.now(datetime.timezone.utc).timestamp())
+            values = {"weight": weight, "bp_systolic": bp_systolic, "bp_diastolic": bp_diastolic,
+                      "heart_rate": heart_rate, "blood_sugar": blood_sugar}
+            samples = [(metric, now, value) for metric, value in values.items() if value is not None]
+            if samples:
+                save_measurements(st.session_state.user_id, samples)
+                st.success("Measurements saved!")
+            else:
+                st.error("Please enter at least one measurement value.")
+    
+    latest = get_latest_measurements(st.session_state.user_id)
+    if latest:
+        columns = st.columns(len(latest))
+        for column, (metric, (ts, value)) in zip(columns, latest.items()):
+            _, label, unit = MEASUREMENT_METRICS[metric]
+            column.metric(f"{label} ({unit})", f"{round(value, 1):g}")
+        
+        st.markdown("---")
+        st.subheader("Trends")
+        
+        # At most a few hundred points per chart, whatever the period: the
+        # store returns one (low, mean, high) row per bucket
+        chart_metric = st.selectbox("Measurement", list(latest), format_func=lambda m: MEASUREMENT_METRICS[m][1])
+        period = st.selectbox("Period", [1, 7, 30, 365, 3650], index=2,
+                              format_func=lambda days: "Last day" if days == 1 else f"Last {days} days")
+        end = int(datetime.datetime.now(datetime.timezone.utc).timestamp())
+        start = end - period * 86400
+        width = bucket_width(start, end)
+        buckets = get_measurement_buckets(st.session_state.user_id, chart_metric, start, end, width)
+        if buckets:
+            bucket_start, count, low, mean, high = zip(*buckets)
+            st.line_chart(pd.DataFrame({"Low": low, "Average": mean, "High": high},
+                                       index=pd.to_datetime(bucket_start, unit="s")))
+        else:
+            st.info("No measurements in this period.")
+    else:
+        st.info("No measurements yet.")
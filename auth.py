@@ -1,10 +1,15 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_user, logout_user, login_required, current_user
-from database import db
-from models import User, UserProfile
+from database import register_user
+from models import User
+from passwords import HashingBusyError
 
 auth_bp = Blueprint('auth', __name__)
 
+def load_user(user_id):
+    # Register with the app's LoginManager: login_manager.user_loader(load_user)
+    return User.get(user_id)
+
 @auth_bp.route('/register', methods=['GET', 'POST'])
 def register():
     if current_user.is_authenticated:
@@ -15,29 +20,29 @@ def register():
         email = request.form.get('email')
         password = request.form.get('password')
         confirm_password = request.form.get('confirm_password')
-        
+
+        if not username or not email or not password:
+            flash('Please fill in all fields', 'danger')
+            return redirect(url_for('auth.register'))
+
         if password != confirm_password:
             flash('Passwords do not match', 'danger')
             return redirect(url_for('auth.register'))
         
-        if User.query.filter_by(username=username).first():
+        # One transaction for user + profile; the unique constraints decide duplicates
+        try:
+            _, duplicate = register_user(username, email, password)
+        except HashingBusyError:
+            flash('The server is busy, please try again in a moment', 'warning')
+            return redirect(url_for('auth.register'))
+        
+        if duplicate == 'username':
             flash('Username already exists', 'danger')
             return redirect(url_for('auth.register'))
             
-        if User.query.filter_by(email=email).first():
+        if duplicate == 'email':
             flash('Email already exists', 'danger')
             return redirect(url_for('auth.register'))
-            
-        user = User(username=username, email=email)
-        user.set_password(password)
-        
-        db.session.add(user)
-        db.session.commit()
-        
-        # Create a profile for the user
-        profile = UserProfile(user_id=user.id)
-        db.session.add(profile)
-        db.session.commit()
         
         flash('Registration successful. Please log in.', 'success')
         return redirect(url_for('auth.login'))
@@ -54,9 +59,13 @@ def login():
         password = request.form.get('password')
         remember = True if request.form.get('remember') else False
         
-        user = User.query.filter_by(username=username).first()
+        try:
+            user = User.authenticate(username, password)
+        except HashingBusyError:
+            flash('The server is busy, please try again in a moment', 'warning')
+            return redirect(url_for('auth.login'))
         
-        if user and user.check_password(password):
+        if user:
             login_user(user, remember=remember)
             next_page = request.args.get('next')
             return redirect(next_page) if next_page else redirect(url_for('main.dashboard'))
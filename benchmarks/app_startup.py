@@ -0,0 +1,107 @@
+"""
+Streamlit cold start and rerun times of app.py, driven by streamlit's
+AppTest.
+
+    python -m benchmarks.app_startup
+    python -m benchmarks.app_startup --processes 5 --reruns 50
+
+Each measurement process loads streamlit first, as a server has, then
+times the first run of the app (the login page, every import included),
+the first visit of each page after logging in, and the median of
+--reruns further runs of each page, which is what every widget
+interaction costs. Pages are visited in menu order, so a module shared
+by several pages is paid for on the first of them. Results are the
+median over --processes fresh processes, against an empty database.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# url path and title of each page shown after logging in, in menu order
+PAGES = (
+    ('health_qa', "Health Q&A"),
+    ('bmi_calculator', "BMI Calculator"),
+    ('vitals', "Vitals"),
+    ('daily_tips', "Daily Tips"),
+    ('symptom_tracker', "Symptom Tracker"),
+    ('chat_history', "Chat History"),
+)
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+
+def _timed(at):
+    start = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(f"app raised: {at.exception}")
+    return elapsed
+
+
+def _measure(reruns):
+    # Runs in a fresh process; prints one JSON result line
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import AppTest, local_script_runner
+    from streamlit.util import calc_md5
+
+    # A server compiles each script once and keeps the bytecode across
+    # reruns; AppTest starts every run with an empty cache
+    script_cache = ScriptCache()
+    local_script_runner.ScriptCache = lambda: script_cache
+    at = AppTest.from_file(APP, default_timeout=60)
+    result = {'cold': _timed(at), 'first': {}, 'rerun': {}}
+    at.session_state.user = 'benchmark'
+    at.session_state.user_id = 1
+    for url_path, title in PAGES:
+        # st.navigation identifies a page by the hash of its url path;
+        # AppTest.switch_page only knows pages/ files
+        at._page_hash = calc_md5(url_path)
+        result['first'][title] = _timed(at)
+        result['rerun'][title] = statistics.median(_timed(at) for _ in range(reruns))
+    print(json.dumps(result))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold start and rerun times of the Streamlit app.")
+    parser.add_argument('--processes', type=int, default=3, help="fresh processes to take the median over")
+    parser.add_argument('--reruns', type=int, default=20, help="timed reruns per page")
+    parser.add_argument('--measure', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.measure:
+        _measure(args.reruns)
+        return
+
+    data_dir = tempfile.mkdtemp(prefix='healthmate-startup-')
+    env = dict(os.environ, HEALTHMATE_DB=os.path.join(data_dir, 'healthmate.db'), HEALTHMATE_METRICS_PORT='')
+    try:
+        # Migrate once so no process times the schema setup
+        subprocess.run([sys.executable, '-m', 'database', env['HEALTHMATE_DB']], env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+        results = []
+        for _ in range(args.processes):
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.app_startup', '--measure', '--reruns', str(args.reruns)],
+                # From the app's directory, as streamlit run is, for .streamlit/config.toml
+                env=env, check=True, capture_output=True, text=True, cwd=os.path.dirname(APP),
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    print(f"cold start (login page): {statistics.median(r['cold'] for r in results) * 1e3:,.0f} ms")
+    print(f"{'page':<16} {'first visit':>12} {'rerun':>10}")
+    for _, title in PAGES:
+        first = statistics.median(r['first'][title] for r in results)
+        rerun = statistics.median(r['rerun'][title] for r in results)
+        print(f"{title:<16} {first * 1e3:>10.1f}ms {rerun * 1e3:>8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+"""
+Synthetic data for load-testing databases: users with skewed activity,
+chat history drawn from the triage vocabulary and symptom records, spread
+over several years. The same seed always produces the same rows.
+
+    python -m benchmarks.datagen load.db --users 10000 --chats 1000000
+    python -m benchmarks.datagen big.db --users 100000 --chats 10000000 --seed 7
+
+Rows are inserted with executemany in large transactions. Secondary
+indexes and triggers are dropped first and rebuilt once at the end. That
+includes the full-text index and the symptom rollups.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+from database.migrations import apply_migrations, response_hash, FTS_REBUILD, ROLLUP_BACKFILL
+from models import ask_healthmate
+from passwords import hash_password
+from triage import EMERGENCY_KEYWORDS, SYMPTOM_KEYWORDS
+
+# Data ends here (fixed, so a seed reproduces the same timestamps)
+END = np.datetime64('2026-01-01T00:00:00', 's')
+DAY = 86400
+
+BATCH_SIZE = 200_000
+TABLES = ('users', 'user_profiles', 'chat_history', 'symptom_records')
+
+# Share of each hour of the day in user activity: quiet at night, busiest
+# in the evening
+HOUR_WEIGHTS = np.array([2, 1, 1, 1, 1, 2, 3, 5, 6, 6, 6, 6, 7, 6, 6, 6, 6, 7, 8, 9, 9, 8, 6, 4], float)
+
+# Keywords that read as "I feel ..." rather than "I have ..."
+_ADJECTIVES = {'hot', 'tired', 'exhausted', 'sick', 'queasy', 'sweating', 'coughing'}
+_NOUN_TEMPLATES = ("I have {} since yesterday", "How do I treat {}?", "{} keeps coming back at night",
+                   "Is {} something to worry about?")
+_ADJECTIVE_TEMPLATES = ("I feel {} today", "I've been {} all week", "Why am I always {} after lunch?")
+_PAIR_TEMPLATE = "I have {} and {}, what should I do?"
+_EMERGENCY_TEMPLATES = ("My father has {}", "Sudden {}, what do I do?")
+_GENERAL_MESSAGES = ("How much water should I drink?", "Is it okay to exercise every day?",
+                     "What is a healthy breakfast?", "How many hours of sleep do I need?",
+                     "Any tips for staying healthy at work?")
+# Share of chat messages by kind
+_MESSAGE_MIX = {'single': 0.70, 'pair': 0.15, 'general': 0.13, 'emergency': 0.02}
+
+# Typical severity per symptom (1-10) and the notes people leave
+_BASE_SEVERITY = {'fever': 6, 'headache': 5, 'cough': 4, 'sore throat': 4, 'fatigue': 5, 'nausea': 5}
+_NOTES = ('', '', '', 'after lunch', 'woke up with it', 'took paracetamol', 'better than yesterday',
+          'worse in the evening')
+
+
+def _messages():
+    # Distinct chat messages and their sampling weights
+    by_kind = {kind: [] for kind in _MESSAGE_MIX}
+    keywords = [kw for kws in SYMPTOM_KEYWORDS.values() for kw in kws]
+    for kw in keywords:
+        templates = _ADJECTIVE_TEMPLATES if kw in _ADJECTIVES else _NOUN_TEMPLATES
+        by_kind['single'].extend(t.format(kw) for t in templates)
+    nouns = [kw for kw in keywords if kw not in _ADJECTIVES]
+    by_kind['pair'].extend(_PAIR_TEMPLATE.format(a, b) for a in nouns for b in nouns if a < b)
+    by_kind['general'].extend(_GENERAL_MESSAGES)
+    by_kind['emergency'].extend(t.format(kw) for kw in EMERGENCY_KEYWORDS for t in _EMERGENCY_TEMPLATES)
+
+    messages, weights = [], []
+    for kind, share in _MESSAGE_MIX.items():
+        messages.extend(m[0].upper() + m[1:] for m in by_kind[kind])
+        weights.extend([share / len(by_kind[kind])] * len(by_kind[kind]))
+    return messages, np.array(weights)
+
+
+def _timestamps(seconds):
+    # Epoch seconds -> 'YYYY-MM-DD HH:MM:SS', the format SQLite's CURRENT_TIMESTAMP uses
+    return [s.replace('T', ' ') for s in np.datetime_as_string(seconds.astype('datetime64[s]'))]
+
+
+def _activity_times(rng, owner, signup, end):
+    # One timestamp per row between the owner's signup and the end of the
+    # data, on a random day at an hour drawn from HOUR_WEIGHTS
+    start = signup[owner]
+    t = start + (rng.random(len(owner)) * (end - start)).astype(np.int64)
+    hours = rng.choice(24, size=len(owner), p=HOUR_WEIGHTS / HOUR_WEIGHTS.sum())
+    t = t - t % DAY + hours * 3600 + rng.integers(0, 3600, len(owner))
+    return np.clip(t, start, end - 1)
+
+
+def _in_batches(conn, sql, rows, count, batch_size, label, log):
+    start = time.perf_counter()
+    done = 0
+    while done < count:
+        batch = rows(done, min(done + batch_size, count))
+        with conn:
+            conn.executemany(sql, batch)
+        done += len(batch)
+    elapsed = time.perf_counter() - start
+    log(f"  {label}: {count:,} rows in {elapsed:.1f}s ({count / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+def generate(path, users=10_000, chats=1_000_000, symptoms=None, years=3, seed=1,
+             password='password', batch_size=BATCH_SIZE, log=print, schema_version=None):
+    """
+    Fill a new database at path with synthetic data; returns row counts.
+
+    Per-user activity follows a heavy-tailed (Pareto) distribution, so a few
+    users own most of the rows, as in real usage. Each user's rows fall
+    between their signup and END, at day-time-weighted hours. Every user
+    gets the same password, so logins can be load-tested too.
+    schema_version stops the schema at an older migration, e.g. 8 for
+    answer text stored in every chat row, to test upgrades.
+    """
+    if symptoms is None:
+        symptoms = chats // 4
+    rng = np.random.default_rng(seed)
+    end = END.astype(np.int64)
+    span = int(years * 365 * DAY)
+
+    conn = sqlite3.connect(path, isolation_level='DEFERRED')
+    apply_migrations(conn, schema_version)
+    if conn.execute("SELECT EXISTS (SELECT 1 FROM users)").fetchone()[0]:
+        conn.close()
+        raise ValueError(f"{path} already has users; generate into a new file")
+
+    # Bulk-load settings: no rollback journal or fsync, large page cache
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA cache_size=-262144")
+    conn.execute("PRAGMA temp_store=MEMORY")
+
+    # Defer index and trigger maintenance to one pass after the load
+    placeholders = ",".join("?" * len(TABLES))
+    deferred = conn.execute(
+        f"SELECT type, name, sql FROM sqlite_master WHERE type IN ('index', 'trigger') "
+        f"AND sql IS NOT NULL AND tbl_name IN ({placeholders}) ORDER BY type = 'trigger'",
+        TABLES
+    ).fetchall()
+    for kind, name, _ in deferred:
+        conn.execute(f"DROP {kind.upper()} {name}")
+
+    log(f"generating {users:,} users, {chats:,} chats, {symptoms:,} symptom records (seed {seed})")
+
+    # Users in signup order; activity weight shrinks for late signups
+    signup = np.sort(end - span + rng.integers(0, int(span * 0.9), users))
+    activity = (rng.pareto(1.16, users) + 1) * (end - signup) / span
+    activity /= activity.sum()
+    password_hash = hash_password(password, salt=rng.bytes(16))
+    signup_at = _timestamps(signup)
+    birth = _timestamps(signup - rng.integers(18 * 365, 80 * 365, users) * DAY)
+    gender = rng.choice(['Male', 'Female'], users)
+    height = np.round(rng.normal(170, 9, users), 1)
+    _in_batches(
+        conn, "INSERT INTO users (id, username, email, password_hash, created_at) VALUES (?, ?, ?, ?, ?)",
+        lambda lo, hi: [(i + 1, f"user{i + 1}", f"user{i + 1}@example.com", password_hash, signup_at[i])
+                        for i in range(lo, hi)],
+        users, batch_size, 'users', log
+    )
+    _in_batches(
+        conn, "INSERT INTO user_profiles (user_id, date_of_birth, gender, height, created_at, updated_at) "
+              "VALUES (?, ?, ?, ?, ?, ?)",
+        lambda lo, hi: [(i + 1, birth[i][:10], str(gender[i]), float(height[i]), signup_at[i], signup_at[i])
+                        for i in range(lo, hi)],
+        users, batch_size, 'user_profiles', log
+    )
+
+    # Chat history in global time order, so ids grow with timestamps
+    messages, weights = _messages()
+    responses = [ask_healthmate(m) for m in messages]
+    owner = np.repeat(np.arange(users), rng.multinomial(chats, activity))
+    at = _activity_times(rng, owner, signup, end)
+    order = np.argsort(at, kind='stable')
+    owner, at = owner[order], at[order]
+    message = rng.choice(len(messages), size=chats, p=weights)
+
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(chat_history)")]
+    if 'response_id' in columns:
+        # Interned answers: one responses row per distinct text
+        distinct = list(dict.fromkeys(responses))
+        with conn:
+            conn.executemany("INSERT INTO responses (id, hash, body) VALUES (?, ?, ?)",
+                             [(i + 1, response_hash(text), text) for i, text in enumerate(distinct)])
+        ids = {text: i + 1 for i, text in enumerate(distinct)}
+        responses = [ids[text] for text in responses]
+        response_column = 'response_id'
+    else:
+        response_column = 'bot_response'
+
+    def chat_rows(lo, hi):
+        stamps = _timestamps(at[lo:hi])
+        return [(int(u) + 1, messages[m], responses[m], ts)
+                for u, m, ts in zip(owner[lo:hi], message[lo:hi], stamps)]
+
+    _in_batches(
+        conn, f"INSERT INTO chat_history (user_id, user_message, {response_column}, timestamp) VALUES (?, ?, ?, ?)",
+        chat_rows, chats, batch_size, 'chat_history', log
+    )
+    del owner, at, message, order
+
+    # Symptom records: half of each user's records are their usual symptom
+    names = list(SYMPTOM_KEYWORDS)
+    usual = rng.integers(0, len(names), users)
+    owner = np.repeat(np.arange(users), rng.multinomial(symptoms, activity))
+    at = _activity_times(rng, owner, signup, end)
+    order = np.argsort(at, kind='stable')
+    owner, at = owner[order], at[order]
+    symptom = np.where(rng.random(symptoms) < 0.5, usual[owner], rng.integers(0, len(names), symptoms))
+    base = np.array([_BASE_SEVERITY[name] for name in names])
+    severity = np.clip(np.rint(rng.normal(base[symptom], 2)), 1, 10).astype(int)
+    note = rng.integers(0, len(_NOTES), symptoms)
+
+    def symptom_rows(lo, hi):
+        stamps = _timestamps(at[lo:hi])
+        return [(int(u) + 1, names[s], int(v), _NOTES[n], ts)
+                for u, s, v, n, ts in zip(owner[lo:hi], symptom[lo:hi], severity[lo:hi], note[lo:hi], stamps)]
+
+    _in_batches(
+        conn, "INSERT INTO symptom_records (user_id, symptom, severity, notes, recorded_at) VALUES (?, ?, ?, ?, ?)",
+        symptom_rows, symptoms, batch_size, 'symptom_records', log
+    )
+
+    start = time.perf_counter()
+    with conn:
+        for _, _, sql in deferred:
+            conn.execute(sql)
+        conn.execute(FTS_REBUILD)
+        conn.execute(ROLLUP_BACKFILL)
+    log(f"  indexes, triggers, search index and rollups rebuilt in {time.perf_counter() - start:.1f}s")
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.close()
+    return {'users': users, 'chat_history': chats, 'symptom_records': symptoms}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic HealthMate database for load tests.")
+    parser.add_argument('path', help="database file to create")
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--chats', type=int, default=1_000_000)
+    parser.add_argument('--symptoms', type=int, help="symptom records (default: chats / 4)")
+    parser.add_argument('--years', type=float, default=3, help="time span of the data, ending at " + str(END)[:10])
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--password', default='password', help="password of every generated user")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="rows per transaction")
+    parser.add_argument('--schema-version', type=int, help="stop migrations at this version (default: latest)")
+    parser.add_argument('--force', action='store_true', help="replace the file if it exists")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.path):
+        if not args.force:
+            parser.error(f"{args.path} exists (use --force to replace it)")
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(args.path + suffix):
+                os.remove(args.path + suffix)
+
+    start = time.perf_counter()
+    generate(args.path, args.users, args.chats, args.symptoms, args.years, args.seed,
+             args.password, args.batch_size, log=lambda line: print(line, file=sys.stderr, flush=True),
+             schema_version=args.schema_version)
+    print(f"{args.path}: done in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Openai backend against the local stub: time to first token versus full
+answer, request coalescing, and connection reuse.
+
+    python -m benchmarks.llm_streaming
+    python -m benchmarks.llm_streaming --clients 32 --first-token-delay 0.5
+"""
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import llm_stub
+from llm import get_backend
+from models import ask_healthmate_stream
+
+
+def timed_stream(chunks):
+    # (seconds to first chunk, seconds to last chunk, text)
+    start = time.perf_counter()
+    first = None
+    parts = []
+    for chunk in chunks:
+        if first is None:
+            first = time.perf_counter() - start
+        parts.append(chunk)
+    return first, time.perf_counter() - start, "".join(parts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=16, help="simultaneous identical questions")
+    parser.add_argument('--first-token-delay', type=float, default=0.3)
+    parser.add_argument('--token-delay', type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    server = llm_stub.start(first_token_delay=args.first_token_delay, token_delay=args.token_delay)
+    # Point the app's backend at the stub
+    os.environ['HEALTHMATE_LLM_BACKEND'] = 'openai'
+    os.environ['HEALTHMATE_LLM_BASE_URL'] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ['HEALTHMATE_LLM_MODEL'] = 'stub'
+    get_backend.cache_clear()
+
+    first, total, _ = timed_stream(ask_healthmate_stream("I have a fever and a cough"))
+    print(f"streaming: first token after {first * 1e3:.0f} ms, full answer after {total * 1e3:.0f} ms")
+
+    first, _, text = timed_stream(ask_healthmate_stream("Chest pain since this morning"))
+    print(f"emergency: answered in {first * 1e3:.2f} ms, upstream calls {server.completions - 1} "
+          f"(the canned emergency response: {text.startswith('⚠️')})")
+
+    for label, prompts in (('identical', ["I feel tired all the time"] * args.clients),
+                           ('distinct', [f"I feel tired all the time ({i})" for i in range(args.clients)])):
+        before = server.completions
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.clients) as pool:
+            results = list(pool.map(lambda p: timed_stream(ask_healthmate_stream(p)), prompts))
+        elapsed = time.perf_counter() - start
+        print(f"{args.clients} {label} questions at once: {server.completions - before} upstream calls, "
+              f"median first token {statistics.median(r[0] for r in results) * 1e3:.0f} ms, all done in {elapsed * 1e3:.0f} ms")
+
+    before = server.connections
+    for i in range(20):
+        timed_stream(ask_healthmate_stream(f"Headache number {i}"))
+    print(f"20 sequential questions opened {server.connections - before} new connection(s)")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
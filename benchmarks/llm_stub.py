@@ -0,0 +1,121 @@
+"""
+Local stand-in for an OpenAI-compatible chat completions API, for testing
+the openai backend without a real model.
+
+    python -m benchmarks.llm_stub --port 8081 --first-token-delay 0.3 --token-delay 0.02
+    HEALTHMATE_LLM_BACKEND=openai HEALTHMATE_LLM_BASE_URL=http://127.0.0.1:8081/v1 streamlit run app.py
+
+Answers are canned text streamed word by word as server-sent events over
+keep-alive HTTP/1.1. GET /stats returns how many completions and TCP
+connections the server has seen.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANSWER = (
+    "Thanks for describing how you feel. Rest, drink plenty of fluids and keep an eye on your "
+    "temperature. Most mild symptoms like these improve within a few days. If they get worse, last "
+    "longer than a week, or you are worried, please contact a doctor."
+)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, first_token_delay=0.0, token_delay=0.0):
+        super().__init__(address, _Handler)
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.completions = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        # Clients closing idle keep-alive connections is expected
+        pass
+
+    def count(self, field):
+        with self.lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.count('connections')
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._send_json(200, {'completions': self.server.completions, 'connections': self.server.connections})
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if not self.path.endswith('/chat/completions'):
+            self._send_json(404, {'error': 'not found'})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        self.server.count('completions')
+        words = ANSWER.split(' ')
+        time.sleep(self.server.first_token_delay)
+
+        if not request.get('stream'):
+            message = {'role': 'assistant', 'content': ANSWER}
+            self._send_json(200, {'choices': [{'index': 0, 'message': message, 'finish_reason': 'stop'}]})
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(self.server.token_delay)
+            delta = {'content': word if i == 0 else ' ' + word}
+            event = {'choices': [{'index': 0, 'delta': delta, 'finish_reason': None}]}
+            self._chunk(f"data: {json.dumps(event)}\n\n".encode())
+        self._chunk(b"data: [DONE]\n\n")
+        self._chunk(b"")
+
+
+def start(port=0, first_token_delay=0.0, token_delay=0.0):
+    """Run a stub server on a daemon thread; returns it (server.server_port has the port)."""
+    server = StubServer(('127.0.0.1', port), first_token_delay, token_delay)
+    threading.Thread(target=server.serve_forever, name='llm-stub', daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stub OpenAI-compatible chat completions server.")
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--first-token-delay', type=float, default=0.3, help="seconds before the first token")
+    parser.add_argument('--token-delay', type=float, default=0.02, help="seconds between tokens")
+    args = parser.parse_args(argv)
+    server = StubServer(('127.0.0.1', args.port), args.first_token_delay, args.token_delay)
+    print(f"stub chat completions at http://127.0.0.1:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Measurements store: bulk ingest of minute-level wearable data, and chart
+queries over it read from the rollups versus aggregated from raw samples.
+
+    python -m benchmarks.measurements
+    python -m benchmarks.measurements --years 5 --users 3 --batch 50000
+
+Each user gets one heart-rate sample per minute for --years years,
+ingested in batches through save_measurements(). Chart queries ask for
+about 300 buckets over windows from a day to the whole history; each is
+timed through the rollup path and as the same GROUP BY over raw samples.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+START = 1_600_000_000
+
+
+def samples(user, years, seed):
+    # One heart-rate sample per minute, a slow daily cycle plus noise
+    rng = np.random.default_rng(seed + user)
+    ts = START + 60 * np.arange(int(years * 365 * 24 * 60))
+    rate = 70 + 8 * np.sin(2 * np.pi * (ts % 86400) / 86400) + rng.normal(0, 4, len(ts))
+    return ts, rate.round(1)
+
+
+def best_of(func, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--users', type=int, default=2)
+    parser.add_argument('--batch', type=int, default=50_000, help="samples per save_measurements() call")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--data-dir', help="keep the database here (default: a temporary directory)")
+    args = parser.parse_args(argv)
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix='healthmate-measurements-')
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, 'measurements.db')
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    # Before anything imports the database package. Whole batches would
+    # all land in the slow query log.
+    os.environ['HEALTHMATE_DB'] = path
+    os.environ.setdefault('HEALTHMATE_SLOW_QUERY_MS', '60000')
+    import database
+    from database.measurements import get_measurement_buckets, bucket_width, save_measurements
+    try:
+        database.init_db()
+        total = 0
+        elapsed = 0.0
+        for user in range(1, args.users + 1):
+            ts, rate = samples(user, args.years, args.seed)
+            for i in range(0, len(ts), args.batch):
+                batch = list(zip(['heart_rate'] * len(ts[i:i + args.batch]),
+                                 ts[i:i + args.batch].tolist(), rate[i:i + args.batch].tolist()))
+                start = time.perf_counter()
+                total += save_measurements(user, batch)
+                elapsed += time.perf_counter() - start
+            print(f"user {user}: {len(ts):,} samples", file=sys.stderr, flush=True)
+        with database.pool.connection() as conn:
+            conn.execute("ANALYZE")
+            rollups = conn.execute("SELECT COUNT(*) FROM measurement_rollups").fetchone()[0]
+        size = os.path.getsize(path)
+        print(f"ingest: {total:,} samples in {elapsed:.1f}s ({total / elapsed:,.0f}/s, {elapsed / total * 1e6:.1f} us each), "
+              f"{rollups:,} rollup rows, {size / 2**20:,.1f} MiB ({size / total:.1f} bytes per sample)")
+
+        start = time.perf_counter()
+        again = save_measurements(1, list(zip(['heart_rate'] * args.batch, samples(1, args.years, args.seed)[0][:args.batch].tolist(),
+                                                [0.0] * args.batch)))
+        print(f"re-ingest of {args.batch:,} stored samples: {again} stored, {time.perf_counter() - start:.2f}s")
+
+        end = START + int(args.years * 365 * 86400)
+        raw = get_measurement_buckets.__wrapped__.__wrapped__
+        print(f"{'window':>8} {'width':>8} {'buckets':>8} {'rollups':>10} {'raw samples':>12}")
+        for days in (1, 7, 30, 365, args.years * 365):
+            window_start = end - int(days * 86400)
+            width = bucket_width(window_start, end)
+            rolled, rows = best_of(lambda: raw(1, 'heart_rate', window_start, end, width))
+            # The same buckets straight from the samples
+            with database.pool.connection() as conn:
+                aligned_start, aligned_end = window_start - window_start % width, -(-end // width) * width
+                direct, direct_rows = best_of(lambda: conn.execute(
+                    "SELECT ts / ?1 * ?1, COUNT(*), MIN(value), AVG(value), MAX(value) FROM measurements "
+                    "WHERE user_id = 1 AND metric = 4 AND ts >= ?2 AND ts < ?3 GROUP BY 1 ORDER BY 1",
+                    (width, aligned_start, aligned_end)).fetchall())
+            assert [r[:3] + r[4:] for r in rows] == [r[:3] + r[4:] for r in direct_rows]
+            print(f"{days:>7.0f}d {width:>7}s {len(rows):>8} {rolled * 1e3:>8.2f}ms {direct * 1e3:>10.2f}ms")
+    finally:
+        database.pool.close_all()
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
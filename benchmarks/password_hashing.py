@@ -0,0 +1,71 @@
+"""
+Login throughput per core at each scrypt cost setting, plus a burst run
+through the bounded hashing pool.
+
+    python -m benchmarks.password_hashing
+    python -m benchmarks.password_hashing --costs 12 14 15 --burst 64
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import passwords
+
+
+def logins_per_second(log_n, seconds=2.0):
+    # Inline hashing on one thread = one core
+    stored = passwords.hash_password('correct horse', n=2 ** log_n)
+    count, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        passwords.verify_password('correct horse', stored)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def burst(log_n, clients):
+    # Many simultaneous logins against the pool: latency and rejections
+    stored = passwords.hash_password('correct horse', n=2 ** log_n)
+
+    def login(_):
+        start = time.perf_counter()
+        try:
+            passwords.verify_password('correct horse', stored)
+            return time.perf_counter() - start
+        except passwords.HashingBusyError:
+            return None
+
+    with ThreadPoolExecutor(clients) as threads:
+        results = list(threads.map(login, range(clients)))
+    latencies = sorted(r for r in results if r is not None)
+    return latencies, results.count(None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--costs', type=int, nargs='+', default=[12, 13, 14, 15, 16], help="log2(N) values")
+    parser.add_argument('--burst', type=int, default=0, help="simultaneous logins for the pool run")
+    args = parser.parse_args(argv)
+
+    workers = passwords.HASH_WORKERS
+    passwords.HASH_WORKERS = 0
+    print(f"{'N':>8} {'memory':>8} {'logins/s/core':>14}")
+    for log_n in args.costs:
+        memory = 128 * 2 ** log_n * passwords.SCRYPT_R / 2 ** 20
+        print(f"{2 ** log_n:>8} {memory:>6.0f}MB {logins_per_second(log_n):>14.1f}")
+    passwords.HASH_WORKERS = workers
+
+    if args.burst and workers > 0:
+        print(f"\nBurst of {args.burst} logins, {workers} workers, queue depth {passwords.HASH_QUEUE_DEPTH}, "
+              f"admission timeout {passwords.ADMISSION_TIMEOUT}s")
+        for log_n in args.costs:
+            latencies, rejected = burst(log_n, args.burst)
+            p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else float('nan')
+            median = statistics.median(latencies) if latencies else float('nan')
+            print(f"  N={2 ** log_n}: served {len(latencies)}, rejected {rejected}, "
+                  f"median {median * 1e3:.0f} ms, p99 {p99 * 1e3:.0f} ms")
+        passwords.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Database size and page cache hit ratio before and after interning chat
+responses (migration 9).
+
+    python -m benchmarks.response_dedup --chats 1000000
+    python -m benchmarks.response_dedup --chats 10000000 --cache-mb 64 --data-dir /var/tmp/hm
+
+Generates a database with the answer text in every chat row (schema
+version 8), copies it and migrates the copy, VACUUMs both, then reads the
+latest messages of random users from each with the same page cache size.
+Hits and misses come from sqlite3_db_status(); memory-mapped I/O is off so
+every page goes through the page cache.
+"""
+import argparse
+import ctypes
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks import datagen
+from database.migrations import apply_migrations
+
+# The latest-messages query before and after migration 9
+LEGACY_QUERY = (
+    "SELECT user_message, bot_response, timestamp FROM chat_history "
+    "WHERE user_id = ? ORDER BY timestamp DESC LIMIT ?"
+)
+INTERNED_QUERY = (
+    "SELECT c.user_message, r.body, c.timestamp FROM chat_history c "
+    "LEFT JOIN responses r ON r.id = c.response_id "
+    "WHERE c.user_id = ? ORDER BY c.timestamp DESC LIMIT ?"
+)
+
+SQLITE_DBSTATUS_CACHE_HIT = 7
+SQLITE_DBSTATUS_CACHE_MISS = 8
+
+
+def _sqlite_status(conn):
+    # sqlite3_db_status is not exposed by the sqlite3 module. The handle is
+    # the first field of the connection object, right after its header.
+    import _sqlite3
+    lib = ctypes.CDLL(_sqlite3.__file__)
+    handle = ctypes.c_void_p.from_address(id(conn) + object.__basicsize__)
+    current, highwater = ctypes.c_int(), ctypes.c_int()
+
+    def read(op):
+        if lib.sqlite3_db_status(handle, op, ctypes.byref(current), ctypes.byref(highwater), 0) != 0:
+            raise RuntimeError("sqlite3_db_status failed")
+        return current.value
+    return lambda: (read(SQLITE_DBSTATUS_CACHE_HIT), read(SQLITE_DBSTATUS_CACHE_MISS))
+
+
+def table_sizes(path):
+    # Bytes per table and index, largest first, from the dbstat virtual table
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name ORDER BY 2 DESC").fetchall()
+    conn.close()
+    return rows
+
+
+def read_workload(path, query, users, reads, cache_mb, seed):
+    conn = sqlite3.connect(path)
+    conn.execute(f"PRAGMA cache_size=-{cache_mb * 1024}")
+    conn.execute("PRAGMA mmap_size=0")
+    status = _sqlite_status(conn)
+    user_ids = np.random.default_rng(seed).integers(1, users + 1, reads).tolist()
+    # One pass to warm the cache, one measured pass over the same users
+    for user_id in user_ids:
+        conn.execute(query, (user_id, 10)).fetchall()
+    hits, misses = status()
+    start = time.perf_counter()
+    for user_id in user_ids:
+        conn.execute(query, (user_id, 10)).fetchall()
+    elapsed = time.perf_counter() - start
+    hits2, misses2 = status()
+    conn.close()
+    hits, misses = hits2 - hits, misses2 - misses
+    return hits / max(hits + misses, 1), misses / reads, elapsed / reads
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--chats', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, help="default: chats / 100")
+    parser.add_argument('--reads', type=int, default=5_000, help="random users read per pass")
+    parser.add_argument('--cache-mb', type=int, default=16, help="page cache per connection (the app uses 16)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--data-dir', help="keep the databases here (default: a temporary directory)")
+    args = parser.parse_args(argv)
+    users = args.users or max(10, args.chats // 100)
+    log = lambda line: print(line, file=sys.stderr, flush=True)
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix='healthmate-dedup-')
+    os.makedirs(data_dir, exist_ok=True)
+    legacy = os.path.join(data_dir, f'dedup-legacy-{args.chats}.db')
+    interned = os.path.join(data_dir, f'dedup-interned-{args.chats}.db')
+    try:
+        if not os.path.exists(legacy):
+            datagen.generate(legacy, users=users, chats=args.chats, seed=args.seed, log=log, schema_version=8)
+            conn = sqlite3.connect(legacy)
+            conn.execute("VACUUM")
+            conn.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(interned + suffix):
+                os.remove(interned + suffix)
+        shutil.copyfile(legacy, interned)
+
+        conn = sqlite3.connect(interned)
+        start = time.perf_counter()
+        apply_migrations(conn)
+        migrated = time.perf_counter() - start
+        start = time.perf_counter()
+        conn.execute("VACUUM")
+        vacuumed = time.perf_counter() - start
+        conn.close()
+        print(f"migration 9 on {args.chats:,} chats: {migrated:.1f}s, then VACUUM {vacuumed:.1f}s")
+
+        sizes = {}
+        for label, path in (('text per row', legacy), ('interned', interned)):
+            sizes[label] = os.path.getsize(path)
+            tables = ", ".join(f"{name} {size / 2**20:,.1f}" for name, size in table_sizes(path)[:4])
+            print(f"{label:>12}: {sizes[label] / 2**20:,.1f} MiB  (largest, MiB: {tables})")
+        print(f"{'':>12}  {sizes['interned'] / sizes['text per row']:.1%} of the original size")
+
+        print(f"latest 10 messages of {args.reads:,} random users, {args.cache_mb} MiB page cache, warm:")
+        for label, path, query in (('text per row', legacy, LEGACY_QUERY), ('interned', interned, INTERNED_QUERY)):
+            ratio, misses, latency = read_workload(path, query, users, args.reads, args.cache_mb, args.seed)
+            print(f"{label:>12}: hit ratio {ratio:.1%}, {misses:.1f} pages read per query, {latency * 1e6:.0f} us per query")
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
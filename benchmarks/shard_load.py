@@ -0,0 +1,99 @@
+"""
+Sharded write load: several processes save chat and symptom rows for
+random users as fast as they can, against one database file and against
+the same data spread over shards.
+
+    python -m benchmarks.shard_load
+    python -m benchmarks.shard_load --processes 8 --writes 2000 --shards 0 2 4 8
+
+Every write is its own transaction, as in the app with write-behind off.
+--shards 0 is the unsharded layout. Each layout gets a fresh database and
+fresh worker processes, which start writing together once all of them
+have opened it.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+_start = None
+
+
+def _init(barrier):
+    global _start
+    _start = barrier
+
+
+def _worker(args):
+    writes, users, seed = args
+    import database
+    database.init_db()
+    rnd = random.Random(seed)
+    latencies = []
+    _start.wait()
+    begin = time.time()
+    for i in range(writes):
+        user_id = rnd.randrange(1, users + 1)
+        start = time.perf_counter()
+        if i % 2:
+            database.save_symptom_record(user_id, 'Headache', rnd.randint(1, 10), 'load test')
+        else:
+            database.save_chat_history(user_id, f"question {i}", "Rest and drink plenty of fluids.")
+        latencies.append(time.perf_counter() - start)
+    return begin, time.time(), latencies
+
+
+def run(shards, processes, writes, users, seed):
+    data_dir = tempfile.mkdtemp(prefix='healthmate-shards-')
+    # Inherited by the spawned workers before they import the database package
+    os.environ['HEALTHMATE_DB'] = os.path.join(data_dir, 'healthmate.db')
+    os.environ['HEALTHMATE_SHARDS'] = str(shards)
+    context = multiprocessing.get_context('spawn')
+    try:
+        # Create the schema up front so migrations are not timed
+        with context.Pool(1) as setup:
+            setup.apply(_init_db)
+        barrier = context.Barrier(processes)
+        with context.Pool(processes, initializer=_init, initargs=(barrier,)) as workers:
+            results = workers.map(_worker, [(writes, users, seed + i) for i in range(processes)])
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    elapsed = max(end for _, end, _ in results) - min(begin for begin, _, _ in results)
+    latencies = sorted(latency for _, _, worker in results for latency in worker)
+    return processes * writes / elapsed, latencies
+
+
+def _init_db():
+    import database
+    database.init_db()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-process write throughput, unsharded vs sharded.")
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--writes', type=int, default=1000, help="writes per process")
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--shards', type=int, nargs='+', default=[0, 2, 4, 8], help="shard counts to run (0: one file)")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+    # Lock waits would otherwise fill the slow query log
+    os.environ.setdefault('HEALTHMATE_SLOW_QUERY_MS', '60000')
+    os.environ.pop('HEALTHMATE_WRITE_BEHIND', None)
+
+    print(f"{args.processes} processes x {args.writes:,} writes, {os.cpu_count()} CPUs")
+    print(f"{'shards':>6} {'writes/s':>10} {'speedup':>8} {'p50':>8} {'p99':>8}")
+    baseline = None
+    for shards in args.shards:
+        rate, latencies = run(shards, args.processes, args.writes, args.users, args.seed)
+        baseline = baseline or rate
+        p50 = statistics.median(latencies)
+        p99 = latencies[int(len(latencies) * 0.99)]
+        print(f"{shards or 1:>6} {rate:>10,.0f} {rate / baseline:>7.2f}x {p50 * 1e3:>6.2f}ms {p99 * 1e3:>6.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
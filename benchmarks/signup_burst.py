@@ -0,0 +1,114 @@
+"""
+Signup burst: many processes register overlapping usernames and emails at
+once against a fresh database, then the result is checked for duplicates
+and users without profiles.
+
+    python -m benchmarks.signup_burst --processes 8 --signups 2000
+
+--mode legacy replays the old blueprint flow (look up username, look up
+email, commit user, commit profile) for comparison.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from multiprocessing import Pool
+
+
+def _attempts(signups, seed):
+    # Roughly a third of the attempts reuse an existing username or email
+    rnd = random.Random(seed)
+    names = [f"user{i}" for i in range(int(signups * 0.7))]
+    attempts = []
+    for i in range(signups):
+        name = rnd.choice(names)
+        email = f"{rnd.choice(names)}@example.com" if rnd.random() < 0.1 else f"{name}@example.com"
+        attempts.append((name, email))
+    return attempts
+
+
+def _legacy_register(conn, username, email, password_hash):
+    if conn.execute("SELECT 1 FROM users WHERE username = ?", (username,)).fetchone():
+        return None, 'username'
+    if conn.execute("SELECT 1 FROM users WHERE email = ?", (email,)).fetchone():
+        return None, 'email'
+    user_id = conn.execute(
+        "INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)",
+        (username, email, password_hash)
+    ).lastrowid
+    conn.commit()
+    conn.execute("INSERT INTO user_profiles (user_id) VALUES (?)", (user_id,))
+    conn.commit()
+    return user_id, None
+
+
+def _worker(args):
+    mode, chunk = args
+    import database
+    from database import pool
+    from passwords import hash_password
+    outcomes = {'created': 0, 'duplicate': 0, 'error': 0}
+    for username, email in chunk:
+        try:
+            if mode == 'legacy':
+                password_hash = hash_password('password123')
+                with pool.connection() as conn:
+                    user_id, duplicate = _legacy_register(conn, username, email, password_hash)
+            else:
+                user_id, duplicate = database.register_user(username, email, 'password123')
+        except sqlite3.IntegrityError:
+            # The check-then-insert race surfaces as an unhandled error
+            outcomes['error'] += 1
+            continue
+        outcomes['created' if user_id else 'duplicate'] += 1
+    return outcomes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent signup throughput and duplicate check.")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--signups', type=int, default=2000)
+    parser.add_argument('--mode', choices=['transaction', 'legacy'], default='transaction')
+    parser.add_argument('--scrypt-n', type=int, default=2 ** 10,
+                        help="scrypt N for the run (low by default so the database path dominates)")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    path = os.path.join(tempfile.mkdtemp(), 'signup_burst.db')
+    # Inherited by the worker processes before they import the database package
+    os.environ['HEALTHMATE_DB'] = path
+    os.environ['HEALTHMATE_SCRYPT_N'] = str(args.scrypt_n)
+    os.environ['HEALTHMATE_HASH_WORKERS'] = '0'
+
+    import database
+    database.init_db()
+
+    attempts = _attempts(args.signups, args.seed)
+    chunks = [(args.mode, attempts[i::args.processes]) for i in range(args.processes)]
+    start = time.perf_counter()
+    with Pool(args.processes) as workers:
+        results = workers.map(_worker, chunks)
+    elapsed = time.perf_counter() - start
+
+    totals = {key: sum(r[key] for r in results) for key in results[0]}
+    conn = sqlite3.connect(path)
+    users = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    unique = conn.execute("SELECT COUNT(DISTINCT username), COUNT(DISTINCT email) FROM users").fetchone()
+    orphans = conn.execute(
+        "SELECT COUNT(*) FROM users u LEFT JOIN user_profiles p ON p.user_id = u.id WHERE p.id IS NULL"
+    ).fetchone()[0]
+    conn.close()
+
+    print(f"mode={args.mode} processes={args.processes} attempts={len(attempts)} in {elapsed:.2f}s "
+          f"({len(attempts) / elapsed:,.0f} signups/s)")
+    print(f"created={totals['created']} duplicate={totals['duplicate']} unhandled_errors={totals['error']}")
+    print(f"users={users} distinct usernames={unique[0]} distinct emails={unique[1]} users without profile={orphans}")
+    ok = users == unique[0] == unique[1] == totals['created'] and orphans == 0 and totals['error'] == 0
+    print("OK: no duplicates, every user has a profile" if ok else "FAILED consistency check")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,340 @@
+"""
+Micro-benchmarks for the core functions, with JSON reports and a
+regression gate.
+
+    python -m benchmarks.suite run --sizes 10k 1M --output bench.json
+    python -m benchmarks.suite compare baseline.json bench.json
+    python -m benchmarks.suite run --output bench.json --baseline baseline.json
+
+The triage and tip functions run in one process. Each database size runs
+in its own process against a fixture database with that many chat rows,
+generated by benchmarks.datagen. Fixtures are built once and kept in
+--data-dir; each run works on a temporary copy, so rows written by the
+write benchmarks never reach the fixture. compare (and run --baseline)
+exit with status 1 when a median or p99 regresses past its threshold.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+SIZES = {'10k': 10_000, '1M': 1_000_000, '10M': 10_000_000}
+
+# Average chat rows per fixture user (benchmarks.datagen skews the split)
+ROWS_PER_USER = 100
+BENCH_PASSWORD = 'benchmark-password'
+
+# Timing loop: at least MIN_ROUNDS calls and MIN_TIME seconds per benchmark
+MIN_ROUNDS = 5
+MIN_TIME = 1.0
+MAX_ROUNDS = 200_000
+# Calls traced for the allocation peak (tracemalloc slows everything down,
+# so it runs apart from the timing loop)
+MEMORY_ROUNDS = 20
+
+# Default regression thresholds, as a fraction of the baseline
+MEDIAN_THRESHOLD = 0.20
+P99_THRESHOLD = 0.50
+# Differences below this many microseconds are treated as noise
+MIN_DELTA_US = 2.0
+
+
+def measure(func):
+    """Time func() repeatedly; returns latency stats in microseconds and the allocation peak."""
+    for _ in range(min(MIN_ROUNDS, 3)):
+        func()
+
+    timings = []
+    clock = time.perf_counter_ns
+    deadline = time.perf_counter() + MIN_TIME
+    while len(timings) < MAX_ROUNDS and (len(timings) < MIN_ROUNDS or time.perf_counter() < deadline):
+        start = clock()
+        func()
+        timings.append(clock() - start)
+
+    tracemalloc.start()
+    peak = 0
+    for _ in range(min(MEMORY_ROUNDS, len(timings))):
+        tracemalloc.reset_peak()
+        func()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'rounds': len(timings),
+        'median_us': statistics.median(timings) / 1e3,
+        'p99_us': timings[max(0, int(len(timings) * 0.99) - 1)] / 1e3,
+        'mean_us': statistics.fmean(timings) / 1e3,
+        'min_us': timings[0] / 1e3,
+        'peak_kib': peak / 1024,
+    }
+
+
+# Triage inputs. The adversarial ones are long runs of near-misses: keyword
+# prefixes that never complete, which is where a backtracking matcher or a
+# per-keyword scan would blow up.
+SHORT_INPUT = "I have a headache"
+LONG_INPUT = " ".join([
+    "Since last week I have been feeling tired most afternoons and my throat hurts when swallowing.",
+    "There is a mild cough in the mornings, sometimes with phlegm, and I get queasy after meals.",
+    "My temperature was slightly high yesterday evening but went down after resting.",
+] * 40)
+ADVERSARIAL_INPUTS = {
+    'adversarial_prefixes': ("chest pai severe hea head pai cough" * 400),
+    'adversarial_repeat': "a" * 50_000,
+    'adversarial_spaces': "sore" + " " * 20_000 + "throa",
+}
+EMERGENCY_INPUT = "My father has chest pain and difficulty breathing"
+
+
+def core_benchmarks():
+    from models import ask_healthmate, get_health_advice, generate_health_tip
+
+    benches = {
+        'ask_healthmate/short': lambda: ask_healthmate(SHORT_INPUT),
+        'ask_healthmate/long': lambda: ask_healthmate(LONG_INPUT),
+        'ask_healthmate/emergency': lambda: ask_healthmate(EMERGENCY_INPUT),
+        'get_health_advice': lambda: get_health_advice('headache'),
+        'generate_health_tip': generate_health_tip,
+    }
+    for name, text in ADVERSARIAL_INPUTS.items():
+        benches[f'ask_healthmate/{name}'] = lambda text=text: ask_healthmate(text)
+    return benches
+
+
+def db_benchmarks(size):
+    import database
+    from database import pool
+    from database.chat import get_chat_history, get_chat_history_page, search_chat_history
+    from database.symptoms import get_symptom_history, get_symptom_history_page, get_symptom_rollups
+
+    database.init_db()
+    # A heavy but not extreme user: the 90th percentile by chat rows
+    with pool.connection() as conn:
+        counts = conn.execute(
+            "SELECT user_id, COUNT(*) AS n FROM chat_history GROUP BY user_id ORDER BY n"
+        ).fetchall()
+        user_id, rows = counts[int(len(counts) * 0.9)]
+        username = conn.execute("SELECT username FROM users WHERE id = ?", (user_id,)).fetchone()[0]
+    print(f"{size}: benchmarking user {user_id} with {rows:,} chat rows", file=sys.stderr, flush=True)
+    # Cursor for the 10th page, or the last one for a lighter user
+    cursor = deep_page = None
+    for _ in range(9):
+        _, cursor = get_chat_history_page.__wrapped__(user_id, cursor)
+        if cursor is None:
+            break
+        deep_page = cursor
+    counter = iter(range(10 ** 9))
+
+    def create_user():
+        n = next(counter)
+        return database.create_user(f"bench{n}", f"bench{n}@example.com", 'pw')
+
+    # __wrapped__ skips the read cache; the *_cached entries show a rerun hit
+    benches = {
+        'verify_user': lambda: database.verify_user(username, BENCH_PASSWORD),
+        'create_user': create_user,
+        'save_chat_history': lambda: database.save_chat_history(user_id, "I have a headache", "Rest."),
+        'save_symptom_record': lambda: database.save_symptom_record(user_id, 'headache', 5, ''),
+        'get_chat_history': lambda: get_chat_history.__wrapped__(user_id, 10),
+        'get_chat_history_cached': lambda: get_chat_history(user_id, 10),
+        'get_chat_history_page/first': lambda: get_chat_history_page.__wrapped__(user_id),
+        'get_chat_history_page/deep': lambda: get_chat_history_page.__wrapped__(user_id, deep_page),
+        'search_chat_history': lambda: search_chat_history.__wrapped__(user_id, 'headache morning'),
+        'get_symptom_history': lambda: get_symptom_history.__wrapped__(user_id, 10),
+        'get_symptom_history_page/first': lambda: get_symptom_history_page.__wrapped__(user_id),
+        'get_symptom_rollups': lambda: get_symptom_rollups.__wrapped__(user_id, '2025-10-03', '2025-12-31'),
+    }
+    return {f'{size}/{name}': func for name, func in benches.items()}
+
+
+def _run_group(group, data_dir, filters):
+    # Runs in a fresh process; for a database group HEALTHMATE_DB is set
+    # before anything imports the database package
+    run_dir = None
+    if group == 'core':
+        benches = core_benchmarks()
+    else:
+        path = os.path.join(data_dir, f'bench-{group}.db')
+        # The run gets a copy of the fixture: copying the file is much
+        # faster than deleting the written rows again through the triggers
+        run_dir = tempfile.mkdtemp(prefix=f'bench-{group}-', dir=data_dir)
+        os.environ['HEALTHMATE_DB'] = os.path.join(run_dir, 'healthmate.db')
+        if not os.path.exists(path):
+            from benchmarks import datagen
+            print(f"building {group} fixture at {path} ...", file=sys.stderr, flush=True)
+            rows = SIZES[group]
+            tmp = path + '.tmp'
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(tmp + suffix):
+                    os.remove(tmp + suffix)
+            datagen.generate(tmp, users=max(10, rows // ROWS_PER_USER), chats=rows, password=BENCH_PASSWORD,
+                             log=lambda line: print(line, file=sys.stderr, flush=True))
+            os.replace(tmp, path)
+        for suffix in ('', '-wal'):
+            if os.path.exists(path + suffix):
+                shutil.copyfile(path + suffix, os.environ['HEALTHMATE_DB'] + suffix)
+
+    try:
+        if run_dir is not None:
+            benches = db_benchmarks(group)
+            from database import pool
+            if pool.path != os.environ['HEALTHMATE_DB']:
+                raise RuntimeError(f"database pool opened {pool.path}, not the fixture copy")
+        benches = {name: func for name, func in benches.items() if not filters or any(f in name for f in filters)}
+
+        results = {}
+        for name, func in benches.items():
+            results[name] = dict(group=group, **measure(func))
+            print(f"{name:<48} median {results[name]['median_us']:>10.1f} us   "
+                  f"p99 {results[name]['p99_us']:>10.1f} us", file=sys.stderr, flush=True)
+    finally:
+        if run_dir is not None:
+            shutil.rmtree(run_dir, ignore_errors=True)
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return results, {'maxrss_kib': maxrss}
+
+
+def _child(pipe, group, data_dir, filters):
+    try:
+        pipe.send(_run_group(group, data_dir, filters))
+    except BaseException as e:
+        pipe.send(e)
+        raise
+    finally:
+        import passwords
+        passwords.shutdown()
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(sizes, data_dir, filters=()):
+    import passwords
+
+    os.makedirs(data_dir, exist_ok=True)
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'sizes': list(sizes),
+            'scrypt': [passwords.SCRYPT_N, passwords.SCRYPT_R, passwords.SCRYPT_P],
+            'hash_workers': passwords.HASH_WORKERS,
+        },
+        'processes': {},
+        'results': {},
+    }
+    # A spawned, non-daemon process per group: it imports the database
+    # package afresh and may start the password hashing pool
+    context = multiprocessing.get_context('spawn')
+    for group in ['core', *sizes]:
+        receiver, sender = context.Pipe(duplex=False)
+        child = context.Process(target=_child, args=(sender, group, data_dir, list(filters)))
+        child.start()
+        sender.close()
+        outcome = receiver.recv()
+        child.join()
+        if isinstance(outcome, BaseException):
+            raise RuntimeError(f"benchmark group {group} failed") from outcome
+        results, process = outcome
+        report['results'].update(results)
+        report['processes'][group] = process
+    return report
+
+
+def compare(baseline, current, median_threshold=MEDIAN_THRESHOLD, p99_threshold=P99_THRESHOLD,
+            min_delta_us=MIN_DELTA_US):
+    """
+    Compare two reports. Returns (rows, regressions) where each row is
+    (name, metric, baseline_us, current_us, change) for benchmarks present
+    in both, and regressions lists the rows past their threshold.
+    """
+    rows, regressions = [], []
+    for name, base in baseline['results'].items():
+        cur = current['results'].get(name)
+        if cur is None:
+            continue
+        for metric, threshold in (('median_us', median_threshold), ('p99_us', p99_threshold)):
+            change = cur[metric] / base[metric] - 1 if base[metric] else 0.0
+            row = (name, metric, base[metric], cur[metric], change)
+            rows.append(row)
+            if change > threshold and cur[metric] - base[metric] > min_delta_us:
+                regressions.append(row)
+    return rows, regressions
+
+
+def _print_comparison(rows, regressions):
+    print(f"{'benchmark':<48} {'metric':<9} {'baseline':>12} {'current':>12} {'change':>8}")
+    for row in rows:
+        name, metric, base, cur, change = row
+        flag = '  REGRESSION' if row in regressions else ''
+        print(f"{name:<48} {metric[:-3]:<9} {base:>10.1f}us {cur:>10.1f}us {change:>+7.1%}{flag}")
+    print(f"\n{len(regressions)} regression(s)" if regressions else "\nno regressions")
+
+
+def _load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HealthMate micro-benchmarks.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run the suite and write a JSON report")
+    run_parser.add_argument('--sizes', nargs='*', choices=list(SIZES), default=['10k'],
+                            help="fixture sizes in chat rows (default: 10k)")
+    run_parser.add_argument('--filter', nargs='*', default=[], help="only benchmarks whose name contains one of these")
+    run_parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'healthmate-bench'),
+                            help="where fixture databases are built and reused")
+    run_parser.add_argument('--output', help="report path (default: bench-<timestamp>.json)")
+    run_parser.add_argument('--baseline', help="compare against this report and fail on regression")
+
+    for sub in (run_parser, commands.add_parser('compare', help="compare two reports")):
+        sub.add_argument('--threshold', type=float, default=MEDIAN_THRESHOLD, help="allowed median slowdown")
+        sub.add_argument('--p99-threshold', type=float, default=P99_THRESHOLD, help="allowed p99 slowdown")
+        sub.add_argument('--min-delta-us', type=float, default=MIN_DELTA_US, help="ignore smaller differences")
+    compare_parser = commands.choices['compare']
+    compare_parser.add_argument('baseline_report')
+    compare_parser.add_argument('current_report')
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        report = run(args.sizes, args.data_dir, args.filter)
+        output = args.output or f"bench-{datetime.now():%Y%m%d-%H%M%S}.json"
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"report written to {output}")
+        if not args.baseline:
+            return 0
+        baseline = _load(args.baseline)
+    else:
+        baseline, report = _load(args.baseline_report), _load(args.current_report)
+
+    rows, regressions = compare(baseline, report, args.threshold, args.p99_threshold, args.min_delta_us)
+    _print_comparison(rows, regressions)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,125 @@
+"""
+Screen a patient roster for BMI offline.
+
+    python bmi_batch.py roster.csv -o screened.csv
+    python bmi_batch.py roster.csv --chunk-rows 500000 > screened.csv
+
+Input is CSV with a header row and height (cm) and weight (kg) columns;
+age and gender columns are optional. Every input column is copied to the
+output, followed by bmi, category and recommendation (an index into
+bmi.RECOMMENDATIONS). The file is processed CHUNK_ROWS rows at a time,
+so memory use does not grow with the roster. Output is written with
+pyarrow's CSV writer when it is installed, several times faster than
+pandas at formatting floats.
+"""
+import argparse
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from bmi import CATEGORIES, compute_bmi
+
+try:
+    import pyarrow
+    import pyarrow.csv
+except ImportError:
+    pyarrow = None
+
+CHUNK_ROWS = 200_000
+
+# Accepted column names per field, after lowercasing
+COLUMNS = {
+    'height': ('height', 'height_cm'),
+    'weight': ('weight', 'weight_kg'),
+    'age': ('age',),
+    'gender': ('gender', 'sex'),
+}
+
+# Category names for the output; category -1 (not scored) picks the ''
+_CATEGORY_NAMES = np.array(CATEGORIES + ('',), dtype=object)
+
+# Rows read so far, and how many fell in each category; the last count is
+# rows without a usable height and weight
+ScreeningProgress = namedtuple('ScreeningProgress', 'rows counts')
+
+
+def _columns(header):
+    found = {}
+    names = {str(name).strip().lower().replace(' ', '_'): name for name in header}
+    for field, aliases in COLUMNS.items():
+        found[field] = next((names[alias] for alias in aliases if alias in names), None)
+    missing = [field for field in ('height', 'weight') if found[field] is None]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+    return found
+
+
+def _write_csv(frame, out, header):
+    if pyarrow is None:
+        frame.to_csv(out, header=header, index=False, encoding='utf-8')
+        return
+    table = pyarrow.Table.from_pandas(frame, preserve_index=False)
+    pyarrow.csv.write_csv(table, out, pyarrow.csv.WriteOptions(include_header=header, quoting_style='needed'))
+
+
+def screen_roster(file, out, chunk_rows=CHUNK_ROWS):
+    """
+    Score a seekable CSV file object (or path) chunk by chunk, writing the
+    scored CSV to the binary stream out; yields a ScreeningProgress per
+    chunk.
+    """
+    columns = _columns(pd.read_csv(file, nrows=0).columns)
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    dtype = {columns['gender']: 'category'} if columns['gender'] is not None else None
+    counts = np.zeros(len(CATEGORIES) + 1, dtype=np.int64)
+    rows = 0
+    for chunk in pd.read_csv(file, chunksize=chunk_rows, dtype=dtype):
+        number = lambda field: pd.to_numeric(chunk[columns[field]], errors='coerce').to_numpy(dtype=float)
+        result = compute_bmi(
+            number('height'), number('weight'),
+            number('age') if columns['age'] is not None else None,
+            chunk[columns['gender']] if columns['gender'] is not None else None,
+        )
+        chunk['bmi'] = result.bmi.round(1)
+        chunk['category'] = _CATEGORY_NAMES[result.category]
+        chunk['recommendation'] = result.recommendation
+        _write_csv(chunk, out, header=rows == 0)
+        rows += len(chunk)
+        # -1 (not scored) is counted in the last slot
+        counts += np.bincount(result.category % len(counts), minlength=len(counts))
+        yield ScreeningProgress(rows, counts.copy())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Screen a CSV roster for BMI.")
+    parser.add_argument('input', help="roster file (.csv)")
+    parser.add_argument('-o', '--output', help="scored roster (default: stdout)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="rows per chunk")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    progress = None
+    out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    try:
+        for progress in screen_roster(args.input, out, args.chunk_rows):
+            elapsed = time.perf_counter() - start
+            print(f"\r{progress.rows:,} rows, {progress.rows / elapsed:,.0f} rows/s", end='', file=sys.stderr)
+    finally:
+        if args.output:
+            out.close()
+    print(file=sys.stderr)
+    if progress is None:
+        print("No rows", file=sys.stderr)
+        return
+    elapsed = time.perf_counter() - start
+    print(f"Screened {progress.rows:,} people in {elapsed:.2f}s", file=sys.stderr)
+    for name, count in zip(CATEGORIES + ('No usable height/weight',), progress.counts):
+        print(f"  {name:<24} {count:>12,} ({count / progress.rows:.1%})", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""
+Shared data access for the Streamlit app and the Flask blueprint.
+
+Everything goes through one connection pool (database.pool), so the
+pragmas, statement cache, read cache and write-behind queue apply to both
+front ends. With HEALTHMATE_SHARDS set, per-user data goes through one
+pool per shard file instead (database.shards). ``database.aio`` has
+asyncio versions of the same functions.
+"""
+import os
+
+from .pool import pool, ConnectionPool
+from .migrations import migrate
+from .shards import SHARD_COUNT, shard_pools, user_pool, data_pools, fan_out, query_shards, shard_row_counts
+from .core import (
+    PAGE_SIZE, init_db, enable_write_behind, disable_write_behind, flush_writes,
+    data_version, invalidate_user, encode_cursor, decode_cursor,
+)
+from .users import (
+    PROFILE_FIELDS, register_user, create_user, verify_user, get_user, get_profile, update_profile,
+)
+from .chat import save_chat_history, get_chat_history, get_chat_history_page, search_chat_history
+from .symptoms import (
+    save_symptom_record, save_symptom_records, get_symptom_history, get_symptom_history_page, get_symptom_rollups,
+)
+from .measurements import (
+    MEASUREMENT_METRICS, bucket_width, save_measurements, save_measurement, get_measurement_buckets,
+    get_latest_measurements,
+)
+from .cache import get_cached_response, save_cached_response, purge_response_cache
+from .export import EXPORT_FORMATS, EXPORT_TABLES, MEDIA_TYPES, export_history, export_filename
+
+# HEALTHMATE_WRITE_BEHIND=1 turns the background writer on at startup
+if os.environ.get('HEALTHMATE_WRITE_BEHIND') == '1':
+    enable_write_behind()
@@ -0,0 +1,18 @@
+# Upgrade database files in place: python -m database healthmate.db ...
+# With HEALTHMATE_SHARDS set, --split [source.db] copies an unsharded
+# database's user data into the shards and --shards counts rows per shard.
+import sys
+
+from .migrations import main
+from .pool import pool
+from .shards import init_shards, shard_pools, shard_row_counts, split
+
+args = sys.argv[1:]
+if args[:1] in (['--split'], ['--shards']):
+    if args[0] == '--split':
+        split(args[1] if len(args) > 1 else None)
+    init_shards()
+    for table, counts in shard_row_counts().items():
+        print(f"{table:<20} " + " ".join(f"{count:>10,}" for count in counts))
+else:
+    main(args or [pool.path] + [db_pool.path for db_pool in shard_pools])
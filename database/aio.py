@@ -0,0 +1,56 @@
+"""
+asyncio versions of the data-access functions, for async front ends.
+
+Each coroutine runs the synchronous function on a small thread pool, so
+both APIs share the same connection pool, statement caches, read cache
+and write-behind queue:
+
+    from database import aio
+    rows, cursor = await aio.get_chat_history_page(user_id)
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from .pool import pool
+from . import core, shards, users, chat, symptoms, measurements
+
+# No more threads than idle pooled connections, so concurrent awaits reuse
+# connections instead of opening new ones
+_executor = ThreadPoolExecutor(max_workers=pool.max_idle, thread_name_prefix='healthmate-db')
+
+def _async(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+    return wrapper
+
+init_db = _async(core.init_db)
+flush_writes = _async(core.flush_writes)
+
+register_user = _async(users.register_user)
+create_user = _async(users.create_user)
+verify_user = _async(users.verify_user)
+get_user = _async(users.get_user)
+get_profile = _async(users.get_profile)
+update_profile = _async(users.update_profile)
+
+save_chat_history = _async(chat.save_chat_history)
+get_chat_history = _async(chat.get_chat_history)
+get_chat_history_page = _async(chat.get_chat_history_page)
+search_chat_history = _async(chat.search_chat_history)
+
+save_symptom_record = _async(symptoms.save_symptom_record)
+save_symptom_records = _async(symptoms.save_symptom_records)
+get_symptom_history = _async(symptoms.get_symptom_history)
+get_symptom_history_page = _async(symptoms.get_symptom_history_page)
+get_symptom_rollups = _async(symptoms.get_symptom_rollups)
+
+save_measurements = _async(measurements.save_measurements)
+save_measurement = _async(measurements.save_measurement)
+get_measurement_buckets = _async(measurements.get_measurement_buckets)
+get_latest_measurements = _async(measurements.get_latest_measurements)
+
+query_shards = _async(shards.query_shards)
+shard_row_counts = _async(shards.shard_row_counts)
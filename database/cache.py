@@ -0,0 +1,27 @@
+from .pool import pool
+from .core import insert
+from metrics import instrumented
+
+@instrumented
+def get_cached_response(key, kb_version, now):
+    """(expires_at, response, cost) of a live cache entry, or None."""
+    with pool.connection() as conn:
+        return conn.execute(
+            "SELECT expires_at, response, cost FROM response_cache WHERE key = ? AND kb_version = ? AND expires_at > ?",
+            (key, kb_version, now)
+        ).fetchone()
+
+@instrumented
+def save_cached_response(key, kb_version, response, cost, expires_at):
+    insert(
+        "INSERT OR REPLACE INTO response_cache (key, kb_version, response, cost, expires_at) VALUES (?, ?, ?, ?, ?)",
+        (key, kb_version, response, cost, expires_at)
+    )
+
+def purge_response_cache(kb_version, now):
+    # Drop expired entries and those written for another knowledge base
+    with pool.transaction() as conn:
+        return conn.execute(
+            "DELETE FROM response_cache WHERE expires_at <= ? OR kb_version != ?",
+            (now, kb_version)
+        ).rowcount
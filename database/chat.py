@@ -0,0 +1,130 @@
+import re
+
+from .core import PAGE_SIZE, cached_read, fetch_page, flush_writes, insert, invalidate_user
+from .migrations import response_hash
+from .shards import user_pool
+from lru import LRUCache
+from metrics import instrumented
+
+# Interned response ids by (database file, content hash); each shard has
+# its own responses table. A response row never changes, so after the
+# first save of a template its id comes from memory.
+_response_ids = LRUCache(4096)
+
+def _known_response_id(db_pool, digest):
+    # Id of an already interned response, or None. Only reads, so it never
+    # waits for the write lock
+    key = (db_pool.path, digest)
+    response_id = _response_ids.get(key)
+    if response_id is None:
+        with db_pool.connection() as conn:
+            row = conn.execute("SELECT id FROM responses WHERE hash = ?", (digest,)).fetchone()
+        if row is not None:
+            response_id = row[0]
+            _response_ids.put(key, response_id)
+    return response_id
+
+@instrumented
+def save_chat_history(user_id, user_message, bot_response):
+    db_pool = user_pool(user_id)
+    digest = response_hash(bot_response) if bot_response is not None else None
+    response_id = _known_response_id(db_pool, digest) if digest is not None else None
+    if digest is None or response_id is not None:
+        insert(
+            "INSERT INTO chat_history (user_id, user_message, response_id) VALUES (?, ?, ?)",
+            (user_id, user_message, response_id),
+            db_pool
+        )
+    else:
+        # New text (e.g. a model answer): both inserts go through the
+        # write-behind queue in order, the chat row finding the id by hash
+        insert("INSERT OR IGNORE INTO responses (hash, body) VALUES (?, ?)", (digest, bot_response), db_pool)
+        insert(
+            "INSERT INTO chat_history (user_id, user_message, response_id) "
+            "VALUES (?, ?, (SELECT id FROM responses WHERE hash = ?))",
+            (user_id, user_message, digest),
+            db_pool
+        )
+    invalidate_user(user_id)
+
+# Chat rows with the answer text joined back in
+_CHAT_ROWS = "FROM chat_history c LEFT JOIN responses r ON r.id = c.response_id "
+
+@cached_read
+@instrumented
+def get_chat_history(user_id, limit=10):
+    db_pool = user_pool(user_id)
+    flush_writes(db_pool)
+    with db_pool.connection() as conn:
+        return conn.execute(
+            "SELECT c.user_message, r.body, c.timestamp " + _CHAT_ROWS +
+            "WHERE c.user_id = ? ORDER BY c.timestamp DESC LIMIT ?",
+            (user_id, limit)
+        ).fetchall()
+
+@cached_read
+@instrumented
+def get_chat_history_page(user_id, cursor=None, page_size=PAGE_SIZE):
+    """
+    Return (rows, next_cursor) for one page of chat history, newest first.
+    Pass next_cursor back to get the following page; it is None on the last page.
+    """
+    return fetch_page(
+        "SELECT c.id, c.user_message, r.body, c.timestamp " + _CHAT_ROWS +
+        "WHERE c.user_id = ? ORDER BY c.timestamp DESC, c.id DESC LIMIT ?",
+        "SELECT * FROM (SELECT c.id, c.user_message, r.body, c.timestamp " + _CHAT_ROWS +
+        "WHERE c.user_id = ?1 AND c.timestamp = ?2 AND c.id < ?3 ORDER BY c.id DESC LIMIT ?4) "
+        "UNION ALL SELECT * FROM (SELECT c.id, c.user_message, r.body, c.timestamp " + _CHAT_ROWS +
+        "WHERE c.user_id = ?1 AND c.timestamp < ?2 ORDER BY c.timestamp DESC, c.id DESC LIMIT ?4) LIMIT ?4",
+        user_id, cursor, page_size
+    )
+
+def _fts_query(user_id, query):
+    # Quote every word so user input can never be read as FTS5 syntax;
+    # the words are ANDed together and with the owner token. They only
+    # match the text columns, or "u42" would match every row of user 42.
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+    terms = " ".join('"' + word + '"' for word in words)
+    return f'owner : "u{int(user_id)}" AND {{user_message bot_response}} : ({terms})'
+
+# Matched-term count in one FTS column, from the markers highlight() inserts
+_HITS = ("(length(highlight(chat_history_fts, {0}, char(1), '')) - "
+         "length(replace(highlight(chat_history_fts, {0}, char(1), ''), char(1), '')))")
+
+# Ranked by matched terms, counting a hit in the user's own question four
+# times one in the answer, newest first on ties. bm25() is avoided on
+# purpose: its IDF step walks each term's doclist across all users, which
+# grows with the whole table, while this only touches the user's matches.
+_SEARCH_SQL = (
+    "SELECT c.user_message, r.body, c.timestamp, "
+    "snippet(chat_history_fts, 1, '**', '**', '…', 16), "
+    "snippet(chat_history_fts, 2, '**', '**', '…', 16) "
+    "FROM chat_history_fts JOIN chat_history c ON c.id = chat_history_fts.rowid "
+    "LEFT JOIN responses r ON r.id = c.response_id "
+    "WHERE chat_history_fts MATCH ? "
+    "ORDER BY 4 * " + _HITS.format(1) + " + " + _HITS.format(2) + " DESC, chat_history_fts.rowid DESC "
+    "LIMIT ?"
+)
+
+@cached_read
+@instrumented
+def search_chat_history(user_id, query, limit=20):
+    """
+    Full-text search over one user's chat history, best match first.
+    Returns (user_message, bot_response, timestamp, snippet) rows; the
+    snippet marks matched words in bold.
+    """
+    match = _fts_query(user_id, query)
+    if match is None:
+        return []
+    db_pool = user_pool(user_id)
+    flush_writes(db_pool)
+    with db_pool.connection() as conn:
+        rows = conn.execute(_SEARCH_SQL, (match, limit)).fetchall()
+    # Show the question's snippet when the match is there, else the answer's
+    return [
+        (user_message, bot_response, timestamp, message_snippet if '**' in message_snippet else response_snippet)
+        for user_message, bot_response, timestamp, message_snippet, response_snippet in rows
+    ]
@@ -0,0 +1,154 @@
+import base64
+import json
+import atexit
+import functools
+import os
+import threading
+import time
+
+from .pool import pool
+from .migrations import migrate
+from .shards import init_shards, shard_pools, user_pool
+from write_behind import WriteBehindQueue
+from lru import LRUCache
+import metrics
+
+# Rows per page for the paginated history reads
+PAGE_SIZE = 20
+
+# Background writers for history inserts, one per database file; empty
+# when writes are synchronous
+_writers = {}
+
+# Per-user write counters and the read cache keyed on them. Every write
+# bumps the user's counter, so cached reads for an older version are never
+# served again and simply age out of the LRU. Counters are per process:
+# when several processes (or app servers on the same shards) write, set
+# HEALTHMATE_READ_CACHE_TTL and keys also carry the current window of that
+# many seconds, so other processes' writes show up within it. Unset, a
+# cached read lives until the user's data changes; 0 turns the cache off.
+READ_CACHE_SIZE = 4096
+READ_CACHE_TTL = float(os.environ['HEALTHMATE_READ_CACHE_TTL']) if os.environ.get('HEALTHMATE_READ_CACHE_TTL') else None
+_versions = {}
+_versions_lock = threading.Lock()
+_read_cache = LRUCache(READ_CACHE_SIZE)
+_MISSING = object()
+
+def _cache_metrics():
+    # Cached reads never reach the instrumented functions, so count them here
+    yield ('healthmate_read_cache_hits_total', "Reads served from the read cache.", 'counter', _read_cache.hits)
+    yield ('healthmate_read_cache_misses_total', "Reads that went to the database.", 'counter', _read_cache.misses)
+    yield ('healthmate_write_behind_pending', "Writes queued but not yet committed.", 'gauge',
+           sum(writer.pending() for writer in list(_writers.values())))
+
+metrics.register_collector(_cache_metrics)
+
+def init_db():
+    migrate(pool)
+    init_shards()
+
+def enable_write_behind(**options):
+    """
+    Queue chat and symptom inserts on a background writer thread.
+    Options are passed to WriteBehindQueue (max_queue, batch_size, max_delay).
+    With sharding there is a writer per shard; returns the directory
+    database's.
+    """
+    for db_pool in (pool, *shard_pools):
+        if db_pool.path not in _writers:
+            writer = _writers[db_pool.path] = WriteBehindQueue(db_pool, **options)
+            atexit.register(writer.close)
+    return _writers[pool.path]
+
+def disable_write_behind():
+    # Drain the queues and go back to synchronous writes
+    while _writers:
+        _, writer = _writers.popitem()
+        writer.close()
+        atexit.unregister(writer.close)
+
+def flush_writes(db_pool=None):
+    # Commit queued writes for one database file, or for all of them
+    if db_pool is not None:
+        writer = _writers.get(db_pool.path)
+        if writer is not None:
+            writer.flush()
+        return
+    for writer in list(_writers.values()):
+        writer.flush()
+
+def data_version(user_id):
+    return _versions.get(user_id, 0)
+
+def invalidate_user(user_id):
+    # Called after any write to a user's chat, symptom or profile data
+    with _versions_lock:
+        _versions[user_id] = _versions.get(user_id, 0) + 1
+
+def cached_read(func):
+    # Serve repeated reads (e.g. Streamlit reruns) from memory until the
+    # user's data changes. Results are shared; callers must not mutate them.
+    @functools.wraps(func)
+    def wrapper(user_id, *args, **kwargs):
+        if READ_CACHE_TTL is None:
+            window = None
+        elif READ_CACHE_TTL > 0:
+            window = int(time.monotonic() // READ_CACHE_TTL)
+        else:
+            return func(user_id, *args, **kwargs)
+        key = (func.__module__, func.__name__, user_id, data_version(user_id), window, args,
+               tuple(sorted(kwargs.items())))
+        value = _read_cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = func(user_id, *args, **kwargs)
+            # A missing row is not cached: it can appear without a write
+            # to that user's data (e.g. the user registering)
+            if value is not None:
+                _read_cache.put(key, value)
+        return value
+    return wrapper
+
+def insert(sql, params, db_pool=pool):
+    # Synchronous fallback when write-behind is off or its queue is full
+    writer = _writers.get(db_pool.path)
+    if writer is not None and writer.submit(sql, params):
+        return
+    with db_pool.transaction() as conn:
+        conn.execute(sql, params)
+
+# Keyset pagination: each page continues strictly after the last seen
+# (time, id) pair, so page N is one index seek like page 1 instead of an
+# OFFSET scan over everything before it. The "after" query is split into
+# same-timestamp and older-timestamp halves because SQLite only seeks on
+# the first column of a row-value comparison, which degrades into a scan
+# when many rows share one timestamp.
+def encode_cursor(sort_value, row_id):
+    raw = json.dumps([sort_value, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor):
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid page cursor: {cursor!r}")
+    return sort_value, row_id
+
+def fetch_page(first_sql, next_sql, user_id, cursor, page_size):
+    # Reads see the caller's own queued writes
+    db_pool = user_pool(user_id)
+    flush_writes(db_pool)
+    # One extra row tells us whether another page exists
+    with db_pool.connection() as conn:
+        if cursor is None:
+            rows = conn.execute(first_sql, (user_id, page_size + 1)).fetchall()
+        else:
+            sort_value, row_id = decode_cursor(cursor)
+            rows = conn.execute(next_sql, (user_id, sort_value, row_id, page_size + 1)).fetchall()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(last[-1], last[0])
+    # Drop the id column; callers get the same row shape as get_*_history
+    return [row[1:] for row in rows], next_cursor
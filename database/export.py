@@ -0,0 +1,214 @@
+"""
+Streaming exports of chat and symptom history as CSV, JSON Lines or
+Parquet, for one user or a whole table.
+
+    with open('symptoms.csv', 'wb') as f:
+        for chunk in export_history('symptom_records', 'csv', user_id=42):
+            f.write(chunk)
+
+Rows come off one cursor CHUNK_ROWS at a time, and each chunk is encoded
+and yielded as bytes before the next is read, so memory stays flat however
+many rows there are. The export is a single SELECT, which in WAL mode
+reads one consistent snapshot while the app keeps writing. With sharding
+a whole-table export reads the shards one after another, each in id
+order. Parquet needs pyarrow.
+"""
+import importlib.util
+import io
+import json
+from itertools import chain
+from json.encoder import encode_basestring
+
+from .core import flush_writes
+from .shards import data_pools, user_pool
+
+# pyarrow is imported by the first Parquet export rather than here: it
+# takes longer to load than the rest of the app's startup imports together
+PARQUET = importlib.util.find_spec('pyarrow') is not None
+
+CHUNK_ROWS = 10_000
+
+# Parquet is offered only when pyarrow is installed
+EXPORT_FORMATS = ('csv', 'jsonl') + (('parquet',) if PARQUET else ())
+MEDIA_TYPES = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson', 'parquet': 'application/vnd.apache.parquet'}
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Per table: (column, Parquet type) pairs, the SELECT, and the ordering
+# for one user (served by the per-user time index, so no sort) and for
+# the whole table (rowid order)
+_TABLES = {
+    'chat_history': (
+        (('id', 'int64'), ('user_id', 'int64'), ('user_message', 'string'), ('bot_response', 'string'),
+         ('timestamp', 'timestamp')),
+        "SELECT c.id, c.user_id, c.user_message, r.body, c.timestamp FROM chat_history c "
+        "LEFT JOIN responses r ON r.id = c.response_id",
+        "WHERE c.user_id = ? ORDER BY c.timestamp, c.id",
+        "ORDER BY c.id",
+    ),
+    'symptom_records': (
+        (('id', 'int64'), ('user_id', 'int64'), ('symptom', 'string'), ('severity', 'int64'),
+         ('notes', 'string'), ('recorded_at', 'timestamp')),
+        "SELECT id, user_id, symptom, severity, notes, recorded_at FROM symptom_records",
+        "WHERE user_id = ? ORDER BY recorded_at, id",
+        "ORDER BY id",
+    ),
+}
+EXPORT_TABLES = tuple(_TABLES)
+
+# Columns with a few long values repeated on many rows
+_REPEATED = {'bot_response'}
+
+
+def _chunks(db_pool, sql, params, chunk_rows):
+    flush_writes(db_pool)
+    with db_pool.detached() as conn:
+        cursor = conn.execute(sql, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_rows)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            cursor.close()
+
+
+def _memo(encode, limit=4096):
+    # encode() for a column whose values repeat, like the interned chat
+    # responses: each distinct text is encoded once. Bounded, so unique
+    # values cannot grow it past limit entries.
+    cache = {}
+
+    def cached(value):
+        encoded = cache.get(value)
+        if encoded is None:
+            if len(cache) >= limit:
+                cache.clear()
+            encoded = cache[value] = encode(value)
+        return encoded
+    return cached
+
+
+def _csv_value(value):
+    # Same output as csv.writer's QUOTE_MINIMAL, without its per-character loop
+    if value is None:
+        return ''
+    text = str(value)
+    if ',' in text or '"' in text or '\n' in text or '\r' in text:
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def _csv(columns, chunks):
+    encoders = [_memo(_csv_value) if name in _REPEATED else _csv_value for name in columns]
+    yield (",".join(map(_csv_value, columns)) + "\r\n").encode()
+    for rows in chunks:
+        yield "".join(
+            ",".join([encode(value) for encode, value in zip(encoders, row)]) + "\r\n" for row in rows
+        ).encode()
+
+
+def _json_value(value):
+    # json.dumps(value, ensure_ascii=False) without its per-call setup, for
+    # the types SQLite returns here
+    if isinstance(value, str):
+        return encode_basestring(value)
+    if isinstance(value, int):
+        return str(value)
+    if value is None:
+        return 'null'
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _jsonl(columns, chunks):
+    keys = [_json_value(name) + ": " for name in columns]
+    encoders = [_memo(_json_value) if name in _REPEATED else _json_value for name in columns]
+    for rows in chunks:
+        yield "".join(
+            "{" + ", ".join([key + encode(value) for key, encode, value in zip(keys, encoders, row)]) + "}\n"
+            for row in rows
+        ).encode()
+
+
+class _Sink(io.RawIOBase):
+    # Write-only stream that hands back what was written since the last drain
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def _parquet(columns, types, chunks):
+    import pyarrow
+    import pyarrow.compute
+    import pyarrow.parquet
+
+    # One row group per chunk
+    fields = [pyarrow.field(name, pyarrow.timestamp('s') if kind == 'timestamp' else getattr(pyarrow, kind)())
+              for name, kind in zip(columns, types)]
+    schema = pyarrow.schema(fields)
+    sink = _Sink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    try:
+        for rows in chunks:
+            arrays = []
+            for field, kind, values in zip(fields, types, zip(*rows)):
+                if kind == 'timestamp':
+                    arrays.append(pyarrow.compute.strptime(
+                        pyarrow.array(values, pyarrow.string()), format=TIMESTAMP_FORMAT, unit='s', error_is_null=True))
+                else:
+                    arrays.append(pyarrow.array(values, field.type))
+            writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_history(table, fmt, user_id=None, chunk_rows=CHUNK_ROWS):
+    """
+    Yield table as fmt ('csv', 'jsonl' or 'parquet') in byte chunks: one
+    user's rows, oldest first, or every row when user_id is None.
+    """
+    if table not in _TABLES:
+        raise ValueError(f"Unknown export table: {table!r}")
+    if fmt == 'parquet' and not PARQUET:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt!r}")
+
+    spec, select, user_order, table_order = _TABLES[table]
+    columns = [name for name, _ in spec]
+    if user_id is None:
+        chunks = chain.from_iterable(
+            _chunks(db_pool, f"{select} {table_order}", (), chunk_rows) for db_pool in data_pools()
+        )
+    else:
+        chunks = _chunks(user_pool(user_id), f"{select} {user_order}", (user_id,), chunk_rows)
+
+    if fmt == 'csv':
+        return _csv(columns, chunks)
+    if fmt == 'jsonl':
+        return _jsonl(columns, chunks)
+    return _parquet(columns, [kind for _, kind in spec], chunks)
+
+
+def export_filename(table, fmt, user_id=None):
+    owner = f"user{user_id}" if user_id is not None else "all"
+    return f"healthmate-{table.replace('_', '-')}-{owner}.{fmt}"
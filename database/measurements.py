@@ -0,0 +1,190 @@
+"""
+Vital-sign measurements stored as a narrow time series.
+
+Each sample is one (user_id, metric, ts, value) row in a table clustered
+on that key, so one user's readings of one metric sit together on disk
+however many other users and metrics there are. ts is unix seconds (UTC)
+and a metric is a small integer code from MEASUREMENT_METRICS.
+
+Every write also folds its samples into hourly and daily (count, total,
+low, high) rollups, and get_measurement_buckets() aggregates the
+coarsest rollup that fits the bucket width asked for. A chart over years
+of minute-level wearable data then reads a few thousand rollup rows
+instead of millions of samples.
+"""
+import time
+
+from .core import cached_read, invalidate_user
+from .shards import user_pool
+from metrics import instrumented
+
+# Metric name -> (code stored in the table, label, unit). The names match
+# the fields of the measurement form; codes must never be reused.
+MEASUREMENT_METRICS = {
+    'weight': (1, 'Weight', 'kg'),
+    'bp_systolic': (2, 'Systolic blood pressure', 'mmHg'),
+    'bp_diastolic': (3, 'Diastolic blood pressure', 'mmHg'),
+    'heart_rate': (4, 'Heart rate', 'bpm'),
+    'blood_sugar': (5, 'Blood sugar', 'mg/dL'),
+    'bmi': (6, 'BMI', 'kg/m²'),
+}
+_CODES = {name: code for name, (code, _, _) in MEASUREMENT_METRICS.items()}
+
+# Rollup bucket widths in seconds, finest first
+ROLLUP_RESOLUTIONS = (3600, 86400)
+
+# Chart bucket widths bucket_width() chooses from
+BUCKET_WIDTHS = (
+    60, 300, 900, 1800, 3600, 3 * 3600, 6 * 3600, 12 * 3600,
+    86400, 2 * 86400, 7 * 86400, 14 * 86400, 28 * 86400, 91 * 86400, 364 * 86400,
+)
+
+
+def bucket_width(start, end, points=300):
+    """The narrowest of BUCKET_WIDTHS giving at most `points` buckets over [start, end)."""
+    span = max(end - start, 1)
+    for width in BUCKET_WIDTHS:
+        if span / width <= points:
+            return width
+    return BUCKET_WIDTHS[-1]
+
+
+def _metric_code(metric):
+    try:
+        return _CODES[metric]
+    except KeyError:
+        raise ValueError(f"Unknown measurement metric: {metric!r}") from None
+
+
+# Samples are staged in per-connection temp tables, so duplicates can be
+# dropped and rollups updated with a handful of set-based statements
+# rather than per-row triggers. Keyed staging keeps the first sample for
+# each (metric, ts) in a batch and hands rows back in primary key order.
+_STAGING = (
+    "CREATE TEMP TABLE IF NOT EXISTS measurement_staging "
+    "(metric INTEGER, ts INTEGER, value REAL, PRIMARY KEY (metric, ts)) WITHOUT ROWID",
+    "CREATE TEMP TABLE IF NOT EXISTS measurement_staging_rollups "
+    "(metric INTEGER, bucket INTEGER, count INTEGER, total REAL, low REAL, high REAL)",
+)
+_MERGE_ROLLUP = '''
+    INSERT INTO measurement_rollups (user_id, metric, resolution, bucket, count, total, low, high)
+    SELECT ?1, metric, ?2, bucket / ?2 * ?2, SUM(count), SUM(total), MIN(low), MAX(high)
+    FROM temp.measurement_staging_rollups WHERE true GROUP BY metric, bucket / ?2
+    ON CONFLICT (user_id, metric, resolution, bucket) DO UPDATE SET
+        count = count + excluded.count,
+        total = total + excluded.total,
+        low = min(low, excluded.low),
+        high = max(high, excluded.high)
+'''
+
+
+def _stage(conn, user_id, rows):
+    conn.executemany("INSERT OR IGNORE INTO temp.measurement_staging (metric, ts, value) VALUES (?, ?, ?)", rows)
+    # A sample already stored wins too, so re-importing a file is a no-op.
+    # Syncs mostly append, so first check whether the batch overlaps
+    # anything stored at all.
+    ranges = conn.execute("SELECT metric, MIN(ts), MAX(ts) FROM temp.measurement_staging GROUP BY metric").fetchall()
+    if any(conn.execute(
+        "SELECT 1 FROM measurements WHERE user_id = ? AND metric = ? AND ts BETWEEN ? AND ? LIMIT 1",
+        (user_id, metric, first, last)
+    ).fetchone() for metric, first, last in ranges):
+        conn.execute(
+            "DELETE FROM temp.measurement_staging WHERE EXISTS (SELECT 1 FROM measurements m "
+            "WHERE m.user_id = ? AND m.metric = measurement_staging.metric AND m.ts = measurement_staging.ts)",
+            (user_id,)
+        )
+
+
+def _roll_up(conn, user_id):
+    # Aggregate the samples once at the finest resolution, then merge
+    # those aggregates into every resolution's rollups
+    conn.execute(
+        "INSERT INTO temp.measurement_staging_rollups (metric, bucket, count, total, low, high) "
+        "SELECT metric, ts / ?1 * ?1, COUNT(*), SUM(value), MIN(value), MAX(value) "
+        "FROM temp.measurement_staging GROUP BY metric, ts / ?1",
+        (ROLLUP_RESOLUTIONS[0],)
+    )
+    for resolution in ROLLUP_RESOLUTIONS:
+        conn.execute(_MERGE_ROLLUP, (user_id, resolution))
+
+
+@instrumented
+def save_measurements(user_id, samples):
+    """
+    Store (metric name, unix ts, value) samples for one user in one
+    transaction; returns the number stored. A sample whose (metric, ts) is
+    already stored, or came earlier in samples, is skipped.
+    """
+    rows = [(_metric_code(metric), int(ts), float(value)) for metric, ts, value in samples]
+    if not rows:
+        return 0
+    with user_pool(user_id).transaction() as conn:
+        for sql in _STAGING:
+            conn.execute(sql)
+        try:
+            _stage(conn, user_id, rows)
+            stored = conn.execute(
+                "INSERT INTO measurements (user_id, metric, ts, value) "
+                "SELECT ?, metric, ts, value FROM temp.measurement_staging",
+                (user_id,)
+            ).rowcount
+            if stored:
+                _roll_up(conn, user_id)
+        finally:
+            conn.execute("DELETE FROM temp.measurement_staging")
+            conn.execute("DELETE FROM temp.measurement_staging_rollups")
+    if stored:
+        invalidate_user(user_id)
+    return stored
+
+
+def save_measurement(user_id, metric, value, ts=None):
+    """Store one sample, taken now unless ts (unix seconds) is given."""
+    return save_measurements(user_id, [(metric, int(time.time()) if ts is None else ts, value)])
+
+
+@cached_read
+@instrumented
+def get_measurement_buckets(user_id, metric, start, end, width):
+    """
+    (bucket_start, count, low, mean, high) for each bucket of `width`
+    seconds holding samples of `metric` between unix times start and end.
+
+    Buckets are aligned to multiples of width, and any bucket overlapping
+    [start, end) is summarized whole. Widths that are a multiple of a
+    rollup resolution are read from the rollups, not the samples.
+    """
+    code = _metric_code(metric)
+    start -= start % width
+    end = -(-end // width) * width
+    resolution = next((r for r in reversed(ROLLUP_RESOLUTIONS) if width % r == 0), None)
+    with user_pool(user_id).connection() as conn:
+        if resolution is not None:
+            return conn.execute(
+                "SELECT bucket / ?1 * ?1, SUM(count), MIN(low), SUM(total) / SUM(count), MAX(high) "
+                "FROM measurement_rollups WHERE user_id = ?2 AND metric = ?3 AND resolution = ?4 "
+                "AND bucket >= ?5 AND bucket < ?6 GROUP BY 1 ORDER BY 1",
+                (width, user_id, code, resolution, start, end)
+            ).fetchall()
+        return conn.execute(
+            "SELECT ts / ?1 * ?1, COUNT(*), MIN(value), AVG(value), MAX(value) "
+            "FROM measurements WHERE user_id = ?2 AND metric = ?3 AND ts >= ?4 AND ts < ?5 GROUP BY 1 ORDER BY 1",
+            (width, user_id, code, start, end)
+        ).fetchall()
+
+
+@cached_read
+@instrumented
+def get_latest_measurements(user_id):
+    """{metric name: (ts, value)} of the newest sample of each metric the user has."""
+    latest = {}
+    with user_pool(user_id).connection() as conn:
+        for name, code in _CODES.items():
+            # One seek to the end of each (user, metric) range
+            row = conn.execute(
+                "SELECT ts, value FROM measurements WHERE user_id = ? AND metric = ? ORDER BY ts DESC LIMIT 1",
+                (user_id, code)
+            ).fetchone()
+            if row is not None:
+                latest[name] = row
+    return latest
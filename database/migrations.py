@@ -0,0 +1,419 @@
+import hashlib
+import threading
+
+from .pool import pool, ConnectionPool
+
+# Rebuild derived data from the base tables; also used after bulk loads
+FTS_REBUILD = "INSERT INTO chat_history_fts (chat_history_fts) VALUES ('rebuild')"
+ROLLUP_BACKFILL = '''
+    INSERT OR REPLACE INTO symptom_daily_rollups (user_id, day, symptom, record_count, severity_sum, severity_max)
+    SELECT user_id, date(recorded_at), symptom, COUNT(*), SUM(severity), MAX(severity)
+    FROM symptom_records
+    WHERE user_id IS NOT NULL AND severity IS NOT NULL
+    GROUP BY user_id, date(recorded_at), symptom
+'''
+
+
+def response_hash(text):
+    # Key of an interned chat response (see migration 9)
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+# Search view and index triggers for chat_history once responses are
+# interned: the indexed answer text is looked up through response_id
+CHAT_SEARCH_VIEW = '''
+    CREATE VIEW IF NOT EXISTS chat_history_search AS
+        SELECT c.id, 'u' || c.user_id AS owner, c.user_message, r.body AS bot_response
+        FROM chat_history c LEFT JOIN responses r ON r.id = c.response_id
+'''
+CHAT_FTS_TRIGGERS = (
+    '''
+    CREATE TRIGGER IF NOT EXISTS chat_history_fts_insert AFTER INSERT ON chat_history BEGIN
+        INSERT INTO chat_history_fts (rowid, owner, user_message, bot_response)
+        VALUES (NEW.id, 'u' || NEW.user_id, NEW.user_message, (SELECT body FROM responses WHERE id = NEW.response_id));
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS chat_history_fts_delete AFTER DELETE ON chat_history BEGIN
+        INSERT INTO chat_history_fts (chat_history_fts, rowid, owner, user_message, bot_response)
+        VALUES ('delete', OLD.id, 'u' || OLD.user_id, OLD.user_message, (SELECT body FROM responses WHERE id = OLD.response_id));
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS chat_history_fts_update AFTER UPDATE ON chat_history BEGIN
+        INSERT INTO chat_history_fts (chat_history_fts, rowid, owner, user_message, bot_response)
+        VALUES ('delete', OLD.id, 'u' || OLD.user_id, OLD.user_message, (SELECT body FROM responses WHERE id = OLD.response_id));
+        INSERT INTO chat_history_fts (rowid, owner, user_message, bot_response)
+        VALUES (NEW.id, 'u' || NEW.user_id, NEW.user_message, (SELECT body FROM responses WHERE id = NEW.response_id));
+    END
+    ''',
+)
+
+
+def _intern_responses(conn):
+    # Rebuild chat_history with a response_id in place of the answer text.
+    # The full-text index keeps the same rowids and text, so it is reused
+    # as is; only its view and triggers change.
+    conn.create_function('response_hash', 1, response_hash, deterministic=True)
+    sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'chat_history'").fetchone()
+    for sql in (
+        'DROP TRIGGER IF EXISTS chat_history_fts_insert',
+        'DROP TRIGGER IF EXISTS chat_history_fts_delete',
+        'DROP TRIGGER IF EXISTS chat_history_fts_update',
+        'DROP VIEW IF EXISTS chat_history_search',
+        '''
+        CREATE TABLE responses (
+            id INTEGER PRIMARY KEY,
+            hash BLOB UNIQUE NOT NULL,
+            body TEXT NOT NULL
+        )
+        ''',
+        '''
+        INSERT INTO responses (hash, body)
+        SELECT response_hash(bot_response), bot_response FROM chat_history
+        WHERE bot_response IS NOT NULL GROUP BY bot_response
+        ''',
+        # Only for the copy below: maps each old row's text to its id
+        'CREATE INDEX responses_body ON responses (body)',
+        '''
+        CREATE TABLE chat_history_interned (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            user_message TEXT,
+            response_id INTEGER,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (response_id) REFERENCES responses (id)
+        )
+        ''',
+        '''
+        INSERT INTO chat_history_interned (id, user_id, user_message, response_id, timestamp)
+        SELECT c.id, c.user_id, c.user_message, r.id, c.timestamp
+        FROM chat_history c LEFT JOIN responses r ON r.body = c.bot_response
+        ORDER BY c.id
+        ''',
+        'DROP INDEX responses_body',
+        'DROP TABLE chat_history',
+        'ALTER TABLE chat_history_interned RENAME TO chat_history',
+        'CREATE INDEX idx_chat_history_user_time ON chat_history (user_id, timestamp)',
+        CHAT_SEARCH_VIEW,
+        *CHAT_FTS_TRIGGERS,
+        'ANALYZE chat_history',
+        'ANALYZE responses',
+    ):
+        conn.execute(sql)
+    if sequence is not None:
+        # Keep AUTOINCREMENT from reusing ids of rows deleted before the copy
+        conn.execute("UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = 'chat_history'", sequence)
+
+
+# Ordered schema migrations: (version, description, statements).
+# Statements are either a tuple of SQL strings or a callable taking the
+# connection, for data migrations that need Python.
+MIGRATIONS = [
+    (1, 'base tables', (
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS chat_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            user_message TEXT,
+            bot_response TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS symptom_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            symptom TEXT NOT NULL,
+            severity INTEGER,
+            notes TEXT,
+            recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''',
+    )),
+    # Per-user history indexes. Every index ends with the rowid, so these
+    # also give a stable (time, id) order. The symptom index covers the
+    # whole history query; the chat one does not carry the message text,
+    # which would duplicate the table for a 10-row lookup.
+    (2, 'per-user history indexes', (
+        'CREATE INDEX IF NOT EXISTS idx_chat_history_user_time ON chat_history (user_id, timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_symptom_records_user_time ON symptom_records (user_id, recorded_at, symptom, severity, notes)',
+    )),
+    (3, 'planner statistics', (
+        'ANALYZE',
+    )),
+    # Keyset pagination orders by (recorded_at, id); put id right after the
+    # timestamp so the covering index also serves that order without a sort.
+    (4, 'symptom index ordered by (recorded_at, id)', (
+        'DROP INDEX IF EXISTS idx_symptom_records_user_time',
+        'CREATE INDEX idx_symptom_records_user_time ON symptom_records (user_id, recorded_at, id, symptom, severity, notes)',
+        'ANALYZE symptom_records',
+    )),
+    # Full-text search over chat history. The FTS index reads its text from
+    # chat_history through a view (external content), so the messages are
+    # not stored twice. The owner column holds a per-user token ("u42") so a
+    # search is an index intersection with that user's rows rather than a
+    # filter over every user's matches.
+    (5, 'chat history full-text search', (
+        '''
+        CREATE VIEW IF NOT EXISTS chat_history_search AS
+            SELECT id, 'u' || user_id AS owner, user_message, bot_response FROM chat_history
+        ''',
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS chat_history_fts USING fts5(
+            owner, user_message, bot_response,
+            content='chat_history_search', content_rowid='id',
+            tokenize='porter unicode61'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS chat_history_fts_insert AFTER INSERT ON chat_history BEGIN
+            INSERT INTO chat_history_fts (rowid, owner, user_message, bot_response)
+            VALUES (NEW.id, 'u' || NEW.user_id, NEW.user_message, NEW.bot_response);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS chat_history_fts_delete AFTER DELETE ON chat_history BEGIN
+            INSERT INTO chat_history_fts (chat_history_fts, rowid, owner, user_message, bot_response)
+            VALUES ('delete', OLD.id, 'u' || OLD.user_id, OLD.user_message, OLD.bot_response);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS chat_history_fts_update AFTER UPDATE ON chat_history BEGIN
+            INSERT INTO chat_history_fts (chat_history_fts, rowid, owner, user_message, bot_response)
+            VALUES ('delete', OLD.id, 'u' || OLD.user_id, OLD.user_message, OLD.bot_response);
+            INSERT INTO chat_history_fts (rowid, owner, user_message, bot_response)
+            VALUES (NEW.id, 'u' || NEW.user_id, NEW.user_message, NEW.bot_response);
+        END
+        ''',
+        # Backfill from existing rows
+        FTS_REBUILD,
+    )),
+    # Daily severity rollups per (user, day, symptom) for the tracker charts,
+    # kept current by triggers so charts never aggregate raw records. The
+    # delete trigger here is replaced by migration 11.
+    (6, 'symptom daily rollups', (
+        '''
+        CREATE TABLE IF NOT EXISTS symptom_daily_rollups (
+            user_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            symptom TEXT NOT NULL,
+            record_count INTEGER NOT NULL,
+            severity_sum INTEGER NOT NULL,
+            severity_max INTEGER NOT NULL,
+            PRIMARY KEY (user_id, day, symptom)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS symptom_rollup_insert AFTER INSERT ON symptom_records
+        WHEN NEW.severity IS NOT NULL BEGIN
+            INSERT INTO symptom_daily_rollups (user_id, day, symptom, record_count, severity_sum, severity_max)
+            VALUES (NEW.user_id, date(NEW.recorded_at), NEW.symptom, 1, NEW.severity, NEW.severity)
+            ON CONFLICT (user_id, day, symptom) DO UPDATE SET
+                record_count = record_count + 1,
+                severity_sum = severity_sum + excluded.severity_sum,
+                severity_max = max(severity_max, excluded.severity_max);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS symptom_rollup_delete AFTER DELETE ON symptom_records
+        WHEN OLD.severity IS NOT NULL BEGIN
+            DELETE FROM symptom_daily_rollups
+            WHERE user_id = OLD.user_id AND day = date(OLD.recorded_at) AND symptom = OLD.symptom;
+            INSERT INTO symptom_daily_rollups (user_id, day, symptom, record_count, severity_sum, severity_max)
+            SELECT user_id, date(recorded_at), symptom, COUNT(*), SUM(severity), MAX(severity)
+            FROM symptom_records
+            WHERE user_id = OLD.user_id AND symptom = OLD.symptom AND severity IS NOT NULL
+              AND recorded_at >= date(OLD.recorded_at) AND recorded_at < date(OLD.recorded_at, '+1 day')
+            GROUP BY user_id, date(recorded_at), symptom;
+        END
+        ''',
+        # Backfill from existing records
+        ROLLUP_BACKFILL,
+    )),
+    # One profile per user, created in the same transaction as the user
+    (7, 'user profiles', (
+        '''
+        CREATE TABLE IF NOT EXISTS user_profiles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER UNIQUE NOT NULL,
+            full_name TEXT,
+            date_of_birth DATE,
+            gender TEXT,
+            height REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''',
+        '''
+        INSERT OR IGNORE INTO user_profiles (user_id)
+        SELECT id FROM users
+        ''',
+    )),
+    # Health Q&A answers shared between processes (see response_cache.py).
+    # The key is a hash of the normalized question; rows from another
+    # knowledge base version or past expires_at (unix time) are never read.
+    (8, 'response cache', (
+        '''
+        CREATE TABLE IF NOT EXISTS response_cache (
+            key TEXT PRIMARY KEY,
+            kb_version TEXT NOT NULL,
+            response TEXT NOT NULL,
+            cost REAL NOT NULL,
+            expires_at REAL NOT NULL
+        ) WITHOUT ROWID
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_response_cache_expiry ON response_cache (expires_at)',
+    )),
+    # Nearly every answer is one of a few templates with a long disclaimer,
+    # so chat rows point at one copy of each distinct text in responses,
+    # found by its content hash. A changed template is new text and gets a
+    # new row; old messages keep pointing at what they were shown.
+    (9, 'interned chat responses', _intern_responses),
+    # Vital-sign samples as a narrow time series clustered on (user,
+    # metric, time), plus hourly and daily aggregates of them for charts.
+    # Metric codes and rollup resolutions are listed in measurements.py.
+    (10, 'vital-sign measurements', (
+        '''
+        CREATE TABLE IF NOT EXISTS measurements (
+            user_id INTEGER NOT NULL,
+            metric INTEGER NOT NULL,
+            ts INTEGER NOT NULL,
+            value REAL NOT NULL,
+            PRIMARY KEY (user_id, metric, ts)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS measurement_rollups (
+            user_id INTEGER NOT NULL,
+            metric INTEGER NOT NULL,
+            resolution INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            total REAL NOT NULL,
+            low REAL NOT NULL,
+            high REAL NOT NULL,
+            PRIMARY KEY (user_id, metric, resolution, bucket)
+        ) WITHOUT ROWID
+        ''',
+    )),
+    # Migration 6's delete trigger rebuilt the bucket from all of the day's
+    # records for every deleted row, so bulk deletes were quadratic. This
+    # one decrements the count and sum in place and drops the bucket when
+    # its last record goes. The max is only looked up again when the
+    # deleted record held it and no other record that day ties it.
+    (11, 'incremental symptom rollup deletes', (
+        'DROP TRIGGER IF EXISTS symptom_rollup_delete',
+        '''
+        CREATE TRIGGER symptom_rollup_delete AFTER DELETE ON symptom_records
+        WHEN OLD.severity IS NOT NULL BEGIN
+            DELETE FROM symptom_daily_rollups
+            WHERE user_id = OLD.user_id AND day = date(OLD.recorded_at) AND symptom = OLD.symptom
+              AND record_count <= 1;
+            UPDATE symptom_daily_rollups SET
+                record_count = record_count - 1,
+                severity_sum = severity_sum - OLD.severity,
+                severity_max = CASE
+                    WHEN OLD.severity < severity_max OR EXISTS (
+                        SELECT 1 FROM symptom_records
+                        WHERE user_id = OLD.user_id AND symptom = OLD.symptom AND severity = OLD.severity
+                          AND recorded_at >= date(OLD.recorded_at) AND recorded_at < date(OLD.recorded_at, '+1 day')
+                    ) THEN severity_max
+                    ELSE (
+                        SELECT MAX(severity) FROM symptom_records
+                        WHERE user_id = OLD.user_id AND symptom = OLD.symptom AND severity IS NOT NULL
+                          AND recorded_at >= date(OLD.recorded_at) AND recorded_at < date(OLD.recorded_at, '+1 day')
+                    )
+                END
+            WHERE user_id = OLD.user_id AND day = date(OLD.recorded_at) AND symptom = OLD.symptom;
+        END
+        ''',
+    )),
+]
+
+_migrated = set()
+_lock = threading.Lock()
+
+
+def schema_version(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def apply_migrations(conn, target=None):
+    """
+    Apply pending migrations on ``conn``, up to version ``target`` if given;
+    returns the list of versions applied.
+
+    Each migration runs in its own write transaction, and the current version
+    is re-read after the write lock is taken so concurrent processes never
+    apply the same migration twice.
+    """
+    applied = []
+    for version, description, statements in MIGRATIONS:
+        if target is not None and version > target:
+            break
+        if version <= schema_version(conn):
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if version <= schema_version(conn):
+                conn.rollback()
+                continue
+            if callable(statements):
+                statements(conn)
+            else:
+                for sql in statements:
+                    conn.execute(sql)
+            conn.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+    return applied
+
+
+def migrate(db_pool=pool):
+    """Bring the pool's database up to date, once per process."""
+    if db_pool.path in _migrated:
+        return
+    with _lock:
+        if db_pool.path in _migrated:
+            return
+        with db_pool.connection() as conn:
+            apply_migrations(conn)
+        _migrated.add(db_pool.path)
+
+
+def main(paths):
+    # Upgrade database files in place (see database/__main__.py)
+    for path in paths:
+        db_pool = ConnectionPool(path)
+        with db_pool.connection() as conn:
+            applied = apply_migrations(conn)
+            version = schema_version(conn)
+        db_pool.close_all()
+        print(f"{path}: schema version {version} (applied {applied or 'nothing'})")
@@ -0,0 +1,117 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from metrics import TimedConnection
+
+DB_PATH = os.environ.get('HEALTHMATE_DB', 'healthmate.db')
+
+# Applied to every new connection. WAL lets readers run alongside the single
+# writer, and synchronous=NORMAL only fsyncs at checkpoints in WAL mode.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",     # 16 MB page cache per connection
+    "PRAGMA mmap_size=268435456",   # 256 MB memory-mapped reads
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+)
+
+# Compiled statements kept per connection (sqlite3's built-in LRU cache)
+STATEMENT_CACHE_SIZE = 256
+
+# Idle connections kept open between checkouts
+MAX_IDLE = 8
+
+
+class ConnectionPool:
+    """
+    Pool of SQLite connections for one database file.
+
+    A connection is owned by a single thread while it is checked out, and
+    nested ``connection()`` calls on that thread reuse it. Streamlit runs
+    every rerun on a fresh thread, so connections go back to the pool on
+    release instead of living in thread-locals forever.
+    """
+
+    def __init__(self, path=DB_PATH, max_idle=MAX_IDLE, statement_cache_size=STATEMENT_CACHE_SIZE):
+        self.path = path
+        self.max_idle = max_idle
+        self.statement_cache_size = statement_cache_size
+        self._idle = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=5,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size,
+            # Logs slow statements with their query plan (see metrics.py)
+            factory=TimedConnection,
+        )
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _checkout(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._connect()
+
+    def _checkin(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    @contextmanager
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            # Nested use on the same thread
+            yield conn
+            return
+
+        conn = self._checkout()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._checkin(conn)
+
+    @contextmanager
+    def detached(self):
+        """
+        Checked-out connection that nested connection() calls on this thread
+        do not share. For generators, which may be resumed or closed on
+        another thread.
+        """
+        conn = self._checkout()
+        try:
+            yield conn
+        finally:
+            self._checkin(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Checked-out connection that commits on success and rolls back on error."""
+        with self.connection() as conn:
+            with conn:
+                yield conn
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+pool = ConnectionPool()
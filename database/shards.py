@@ -0,0 +1,166 @@
+"""
+Optional sharding of per-user data across several SQLite files.
+
+SQLite lets one writer at a time into a database file, so with several
+app processes every chat and symptom insert waits on the same write
+lock. With HEALTHMATE_SHARDS=N, each user's chat history, symptom
+records and measurements live in one of N shard files picked by a hash
+of the user id, and writes for users on different shards never wait for
+each other. Accounts, profiles and the response cache stay in the
+directory database at HEALTHMATE_DB; shard k is the file next to it
+with '-shard<k>' before the extension.
+
+N must not change once data is written, since it decides where each
+user's rows are. To shard an existing database, set HEALTHMATE_SHARDS
+and copy its user data into the shards once:
+
+    HEALTHMATE_SHARDS=4 python -m database --split
+    HEALTHMATE_SHARDS=4 python -m database --shards     # rows per shard
+"""
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
+from .pool import pool, ConnectionPool
+from .migrations import migrate
+
+# 0 keeps everything in the one database file
+SHARD_COUNT = int(os.environ.get('HEALTHMATE_SHARDS', '0'))
+
+# Tables holding per-user rows, moved by split
+SHARDED_TABLES = ('chat_history', 'symptom_records', 'measurements', 'measurement_rollups')
+
+# Shard k hands out chat and symptom ids from (k + 1) * ID_BLOCK, so ids
+# stay unique across shards and ids below ID_BLOCK are left to rows
+# copied from an unsharded database
+ID_BLOCK = 1 << 40
+
+
+def shard_path(path, index):
+    stem, ext = os.path.splitext(path)
+    return f"{stem}-shard{index}{ext or '.db'}"
+
+
+def shard_index(user_id, count=SHARD_COUNT):
+    # crc32 rather than hash() so every process and version agrees
+    return zlib.crc32(str(int(user_id)).encode()) % count
+
+
+shard_pools = [ConnectionPool(shard_path(pool.path, index)) for index in range(SHARD_COUNT)]
+
+
+def user_pool(user_id):
+    """Pool of the database file holding user_id's chat, symptom and measurement rows."""
+    if not shard_pools:
+        return pool
+    return shard_pools[shard_index(user_id, len(shard_pools))]
+
+
+def data_pools():
+    """Every pool holding per-user rows: the shards, or the one database."""
+    return shard_pools or [pool]
+
+
+_initialized = set()
+_lock = threading.Lock()
+
+
+def init_shards():
+    # Migrate each shard and reserve its id block, once per process
+    for index, db_pool in enumerate(shard_pools):
+        if db_pool.path in _initialized:
+            continue
+        with _lock:
+            if db_pool.path in _initialized:
+                continue
+            migrate(db_pool)
+            with db_pool.transaction() as conn:
+                for table in ('chat_history', 'symptom_records'):
+                    conn.execute(
+                        "INSERT INTO sqlite_sequence (name, seq) SELECT ?1, 0 "
+                        "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = ?1)",
+                        (table,)
+                    )
+                    conn.execute(
+                        "UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = ?",
+                        ((index + 1) * ID_BLOCK, table)
+                    )
+            _initialized.add(db_pool.path)
+
+
+def fan_out(func, *args):
+    """
+    Call func(db_pool, *args) for every data pool at once, one thread per
+    shard, and return the results in shard order. For admin queries
+    spanning users; sqlite3 releases the GIL while a statement runs, so
+    the shards are read in parallel.
+    """
+    pools = data_pools()
+    if len(pools) == 1:
+        return [func(pools[0], *args)]
+    with ThreadPoolExecutor(max_workers=len(pools), thread_name_prefix='healthmate-shard') as executor:
+        return list(executor.map(lambda db_pool: func(db_pool, *args), pools))
+
+
+def _fetch_all(db_pool, sql, params):
+    with db_pool.connection() as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def query_shards(sql, params=()):
+    """Rows of one query run on every shard, concatenated in shard order."""
+    return list(chain.from_iterable(fan_out(_fetch_all, sql, params)))
+
+
+def shard_row_counts():
+    """{table: [rows in each shard]} for SHARDED_TABLES."""
+    sql = " UNION ALL ".join(f"SELECT COUNT(*) FROM {table}" for table in SHARDED_TABLES)
+    counts = fan_out(_fetch_all, sql, ())
+    return {table: [rows[i][0] for rows in counts] for i, table in enumerate(SHARDED_TABLES)}
+
+
+# Copies one shard's users out of an attached unsharded database. All of
+# responses is copied so chat rows keep their response ids; the triggers
+# rebuild the search index and symptom rollups as rows arrive.
+_SPLIT = (
+    "INSERT INTO responses (id, hash, body) SELECT id, hash, body FROM source.responses",
+    "INSERT INTO chat_history (id, user_id, user_message, response_id, timestamp) "
+    "SELECT id, user_id, user_message, response_id, timestamp FROM source.chat_history "
+    "WHERE user_id IS NOT NULL AND shard_index(user_id) = ?1 ORDER BY id",
+    "INSERT INTO symptom_records (id, user_id, symptom, severity, notes, recorded_at) "
+    "SELECT id, user_id, symptom, severity, notes, recorded_at FROM source.symptom_records "
+    "WHERE user_id IS NOT NULL AND shard_index(user_id) = ?1 ORDER BY id",
+    "INSERT INTO measurements SELECT * FROM source.measurements WHERE user_id IS NOT NULL AND shard_index(user_id) = ?1",
+    "INSERT INTO measurement_rollups SELECT * FROM source.measurement_rollups WHERE user_id IS NOT NULL AND shard_index(user_id) = ?1",
+)
+
+
+def split(source=None):
+    """
+    Copy the per-user rows of an unsharded database (the directory
+    database by default) into empty shards. The source rows are left in
+    place but are no longer read.
+    """
+    if not shard_pools:
+        raise RuntimeError("Set HEALTHMATE_SHARDS to the number of shards first")
+    source_pool = ConnectionPool(source) if source else pool
+    migrate(source_pool)
+    if source_pool is not pool:
+        source_pool.close_all()
+    init_shards()
+    if any(sum(counts) for counts in shard_row_counts().values()):
+        raise RuntimeError("Shards already hold data; split only into empty shards")
+    for index, db_pool in enumerate(shard_pools):
+        with db_pool.connection() as conn:
+            conn.create_function('shard_index', 1, lambda user_id: shard_index(user_id, len(shard_pools)),
+                                 deterministic=True)
+            conn.execute("ATTACH DATABASE ? AS source", (source_pool.path,))
+            try:
+                with conn:
+                    for sql in _SPLIT:
+                        conn.execute(sql, (index,) if '?1' in sql else ())
+            finally:
+                conn.execute("DETACH DATABASE source")
+
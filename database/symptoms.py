@@ -0,0 +1,70 @@
+from .core import PAGE_SIZE, cached_read, fetch_page, flush_writes, insert, invalidate_user
+from .shards import user_pool
+from metrics import instrumented
+
+@instrumented
+def save_symptom_record(user_id, symptom, severity, notes):
+    insert(
+        "INSERT INTO symptom_records (user_id, symptom, severity, notes) VALUES (?, ?, ?, ?)",
+        (user_id, symptom, severity, notes),
+        user_pool(user_id)
+    )
+    invalidate_user(user_id)
+
+@instrumented
+def save_symptom_records(user_id, records):
+    """
+    Insert (symptom, severity, notes, recorded_at) records for one user in a
+    single transaction with executemany; returns the number inserted.
+    """
+    with user_pool(user_id).transaction() as conn:
+        count = conn.executemany(
+            "INSERT INTO symptom_records (user_id, symptom, severity, notes, recorded_at) VALUES (?, ?, ?, ?, ?)",
+            [(user_id, symptom, severity, notes, recorded_at) for symptom, severity, notes, recorded_at in records]
+        ).rowcount
+    invalidate_user(user_id)
+    return count
+
+@cached_read
+@instrumented
+def get_symptom_history(user_id, limit=10):
+    db_pool = user_pool(user_id)
+    flush_writes(db_pool)
+    with db_pool.connection() as conn:
+        return conn.execute(
+            "SELECT symptom, severity, notes, recorded_at FROM symptom_records WHERE user_id = ? ORDER BY recorded_at DESC LIMIT ?",
+            (user_id, limit)
+        ).fetchall()
+
+@cached_read
+@instrumented
+def get_symptom_rollups(user_id, start_day, end_day):
+    """
+    Daily (day, symptom, record_count, severity_sum, severity_max) buckets
+    for one user between two ISO dates, inclusive. Reads at most one row per
+    symptom per day, however many raw records the user has.
+    """
+    db_pool = user_pool(user_id)
+    flush_writes(db_pool)
+    with db_pool.connection() as conn:
+        return conn.execute(
+            "SELECT day, symptom, record_count, severity_sum, severity_max FROM symptom_daily_rollups "
+            "WHERE user_id = ? AND day BETWEEN ? AND ? ORDER BY day",
+            (user_id, start_day, end_day)
+        ).fetchall()
+
+@cached_read
+@instrumented
+def get_symptom_history_page(user_id, cursor=None, page_size=PAGE_SIZE):
+    """
+    Return (rows, next_cursor) for one page of symptom records, newest first.
+    """
+    return fetch_page(
+        "SELECT id, symptom, severity, notes, recorded_at FROM symptom_records "
+        "WHERE user_id = ? ORDER BY recorded_at DESC, id DESC LIMIT ?",
+        "SELECT * FROM (SELECT id, symptom, severity, notes, recorded_at FROM symptom_records "
+        "WHERE user_id = ?1 AND recorded_at = ?2 AND id < ?3 ORDER BY id DESC LIMIT ?4) "
+        "UNION ALL SELECT * FROM (SELECT id, symptom, severity, notes, recorded_at FROM symptom_records "
+        "WHERE user_id = ?1 AND recorded_at < ?2 ORDER BY recorded_at DESC, id DESC LIMIT ?4) LIMIT ?4",
+        user_id, cursor, page_size
+    )
@@ -0,0 +1,107 @@
+import sqlite3
+
+from .pool import pool
+from .core import cached_read, invalidate_user
+from metrics import instrumented
+from passwords import DUMMY_HASH, hash_password, verify_password
+
+# Profile columns callers may set through update_profile
+PROFILE_FIELDS = ('full_name', 'date_of_birth', 'gender', 'height')
+
+@instrumented
+def register_user(username, email, password):
+    """
+    Create a user and their profile in a single transaction.
+
+    Returns (user_id, None) on success, or (None, field) where field is
+    'username' or 'email' when that value is already taken. Uniqueness is
+    left to the table constraints, so concurrent signups cannot slip in
+    between a lookup and the insert. Any other constraint failure, such
+    as a missing username, is raised as sqlite3.IntegrityError.
+    """
+    # Hash before taking a connection; scrypt runs in the hashing pool
+    password_hash = hash_password(password)
+    try:
+        with pool.transaction() as conn:
+            user_id = conn.execute(
+                "INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)",
+                (username, email, password_hash)
+            ).lastrowid
+            conn.execute("INSERT INTO user_profiles (user_id) VALUES (?)", (user_id,))
+        invalidate_user(user_id)
+        return user_id, None
+    except sqlite3.IntegrityError as e:
+        # Only a UNIQUE failure means taken; NOT NULL failures name the
+        # same columns ("NOT NULL constraint failed: users.username")
+        message = str(e)
+        if message == 'UNIQUE constraint failed: users.email':
+            return None, 'email'
+        if message == 'UNIQUE constraint failed: users.username':
+            return None, 'username'
+        raise
+
+@instrumented
+def create_user(username, email, password):
+    user_id, _ = register_user(username, email, password)
+    return user_id is not None
+
+@instrumented
+def verify_user(username, password):
+    with pool.connection() as conn:
+        user = conn.execute(
+            "SELECT id, password_hash FROM users WHERE username = ?",
+            (username,)
+        ).fetchone()
+    if not user:
+        # Same scrypt work (and admission control) as a real account
+        verify_password(password, DUMMY_HASH)
+        return None
+
+    matches, needs_rehash = verify_password(password, user[1])
+    if not matches:
+        return None
+    if needs_rehash:
+        # Upgrade legacy SHA-256 (or old-cost) hashes on successful login
+        new_hash = hash_password(password)
+        with pool.transaction() as conn:
+            conn.execute(
+                "UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?",
+                (new_hash, user[0], user[1])
+            )
+    return user[0]  # 返回用户ID
+
+@cached_read
+@instrumented
+def get_user(user_id):
+    """(id, username, email, created_at) for one user, or None."""
+    with pool.connection() as conn:
+        return conn.execute(
+            "SELECT id, username, email, created_at FROM users WHERE id = ?",
+            (user_id,)
+        ).fetchone()
+
+@cached_read
+@instrumented
+def get_profile(user_id):
+    """(full_name, date_of_birth, gender, height, updated_at) for one user, or None."""
+    with pool.connection() as conn:
+        return conn.execute(
+            "SELECT full_name, date_of_birth, gender, height, updated_at FROM user_profiles WHERE user_id = ?",
+            (user_id,)
+        ).fetchone()
+
+@instrumented
+def update_profile(user_id, **fields):
+    unknown = set(fields) - set(PROFILE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown profile fields: {', '.join(sorted(unknown))}")
+    if not fields:
+        return
+    # Column names come from PROFILE_FIELDS only; values are bound
+    assignments = ", ".join(f"{name} = ?" for name in fields)
+    with pool.transaction() as conn:
+        conn.execute(
+            f"UPDATE user_profiles SET {assignments}, updated_at = CURRENT_TIMESTAMP WHERE user_id = ?",
+            (*fields.values(), user_id)
+        )
+    invalidate_user(user_id)
@@ -0,0 +1,51 @@
+"""
+Dump chat or symptom history to a file, for one user or everyone.
+
+    python export.py symptom_records -o symptoms.csv --user 42
+    python export.py chat_history -o chats.parquet --db instance/healthmate.db
+    python export.py chat_history --format jsonl > chats.jsonl
+
+The format follows the output file's extension unless --format is given.
+Rows are streamed, so memory use does not grow with the table.
+"""
+import argparse
+import os
+import sys
+import time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export HealthMate history.")
+    parser.add_argument('table', choices=('chat_history', 'symptom_records'))
+    parser.add_argument('-o', '--output', help="output file (default: stdout)")
+    parser.add_argument('-f', '--format', choices=('csv', 'jsonl', 'parquet'), help="parquet needs pyarrow")
+    parser.add_argument('--user', type=int, help="only this user id's rows")
+    parser.add_argument('--db', help="database file (default: HEALTHMATE_DB or healthmate.db)")
+    args = parser.parse_args(argv)
+
+    fmt = args.format
+    if fmt is None:
+        ext = os.path.splitext(args.output or '')[1].lstrip('.').lower()
+        fmt = ext if ext in ('csv', 'jsonl', 'parquet') else 'csv'
+    if args.db:
+        # Before the database package opens its pool
+        os.environ['HEALTHMATE_DB'] = args.db
+    from database import export_history, init_db
+    init_db()
+
+    start = time.perf_counter()
+    written = 0
+    out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    try:
+        for chunk in export_history(args.table, fmt, user_id=args.user):
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if args.output:
+            out.close()
+    print(f"{args.table}: {written / 2**20:,.1f} MiB of {fmt} in {time.perf_counter() - start:.1f}s",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+from functools import lru_cache
+from types import MappingProxyType
+
+KB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'health_advice.json')
+
+
+def _freeze(entry):
+    return MappingProxyType({
+        'description': entry['description'],
+        'advice': tuple(entry['advice']),
+        'when_to_see_doctor': entry['when_to_see_doctor'],
+    })
+
+
+def _render_section(symptom, advice):
+    lines = [f"**About {symptom}:**", "", advice['description'], "", "**Recommended actions:**"]
+    lines.extend(f"{i}. {item}" for i, item in enumerate(advice['advice'], 1))
+    lines.extend(["", "**When to see a doctor:**", advice['when_to_see_doctor'], "", ""])
+    return "\n".join(lines)
+
+
+def _render_general(general):
+    lines = [general['intro'], ""]
+    lines.extend(f"{i}. {item}" for i, item in enumerate(general['advice'], 1))
+    lines.extend(["", general['closing'], "", ""])
+    return "\n".join(lines)
+
+
+def load(path=KB_PATH):
+    """
+    Read the advice knowledge base and pre-render every response.
+
+    Returns a read-only mapping. Rendered strings are built here once, so
+    answering a question is a dictionary lookup.
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+    data = json.loads(raw.decode('utf-8'))
+
+    footer = "---\n" + data['disclaimer']
+    advice = {name.lower(): _freeze(entry) for name, entry in data['symptoms'].items()}
+    sections = {name: _render_section(name, entry) for name, entry in advice.items()}
+
+    return MappingProxyType({
+        # Content hash, changes whenever the data file does
+        'version': hashlib.sha256(raw).hexdigest()[:16],
+        'advice': MappingProxyType(advice),
+        'default': _freeze(data['default']),
+        'sections': MappingProxyType(sections),
+        'responses': MappingProxyType({name: section + footer for name, section in sections.items()}),
+        'general_response': _render_general(data['general']) + footer,
+        'emergency_response': data['emergency_response'],
+        'footer': footer,
+    })
+
+
+KB = load()
+VERSION = KB['version']
+EMERGENCY_RESPONSE = KB['emergency_response']
+GENERAL_RESPONSE = KB['general_response']
+FOOTER = KB['footer']
+
+
+def get_advice(symptom):
+    return KB['advice'].get(symptom.lower(), KB['default'])
+
+
+def _section(symptom):
+    section = KB['sections'].get(symptom)
+    if section is None:
+        section = _render_section(symptom, get_advice(symptom))
+    return section
+
+
+def render_sections(symptoms):
+    """Advice sections for the given symptoms, without the disclaimer footer."""
+    return "".join(_section(symptom) for symptom in symptoms)
+
+
+@lru_cache(maxsize=256)
+def _combined_response(symptoms):
+    return render_sections(symptoms) + KB['footer']
+
+
+EMERGENCY_RESPONSE_ID = 'emergency'
+GENERAL_RESPONSE_ID = 'general'
+
+
+def response_id(symptoms, emergency=False):
+    """Stable name of the response ask_healthmate gives, e.g. 'fever+cough'."""
+    if emergency:
+        return EMERGENCY_RESPONSE_ID
+    if not symptoms:
+        return GENERAL_RESPONSE_ID
+    return '+'.join(symptoms)
+
+
+def render_response(symptoms):
+    """Full markdown answer for a tuple of detected symptoms, in mention order."""
+    if not symptoms:
+        return GENERAL_RESPONSE
+    if len(symptoms) == 1:
+        response = KB['responses'].get(symptoms[0])
+        if response is not None:
+            return response
+    return _combined_response(tuple(symptoms))
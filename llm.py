@@ -0,0 +1,232 @@
+"""
+Answer backends for Health Q&A.
+
+A backend turns a question (plus the symptoms triage found in it) into a
+markdown answer, either at once with complete() or as a stream of text
+chunks with stream(). Emergencies never reach a backend; models.py
+answers those first.
+
+    HEALTHMATE_LLM_BACKEND=template   pre-rendered knowledge-base answers (default)
+    HEALTHMATE_LLM_BACKEND=openai     any OpenAI-compatible chat completions API:
+        HEALTHMATE_LLM_BASE_URL   default https://api.openai.com/v1
+        HEALTHMATE_LLM_API_KEY    (or OPENAI_API_KEY)
+        HEALTHMATE_LLM_MODEL      default gpt-4o-mini
+"""
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from knowledge_base import FOOTER, render_response, render_sections
+
+SYSTEM_PROMPT = (
+    "You are HealthMate, a careful health assistant. Give general, practical advice in Markdown. "
+    "Do not diagnose. Say when the person should see a doctor. Base your answer on the reference "
+    "advice when it is relevant."
+)
+
+# Upstream connections kept open per backend, and (connect, read) timeouts
+MAX_CONNECTIONS = int(os.environ.get('HEALTHMATE_LLM_MAX_CONNECTIONS', 8))
+TIMEOUT = (3.05, float(os.environ.get('HEALTHMATE_LLM_TIMEOUT', 60)))
+
+
+class BackendError(RuntimeError):
+    """The upstream model could not produce an answer."""
+
+
+class Backend:
+    name = None
+
+    @property
+    def tag(self):
+        # Identifies this backend's answers in the response cache; None
+        # leaves them uncached
+        return self.name
+
+    def stream(self, prompt, symptoms):
+        """Yield the answer to prompt as text chunks."""
+        raise NotImplementedError
+
+    def complete(self, prompt, symptoms):
+        return "".join(self.stream(prompt, symptoms))
+
+
+class TemplateBackend(Backend):
+    """The knowledge base's pre-rendered answers; no network."""
+
+    name = 'template'
+    # Not cached: a response cache hit costs more than this lookup
+    tag = None
+
+    def stream(self, prompt, symptoms):
+        yield render_response(symptoms)
+
+    def complete(self, prompt, symptoms):
+        return render_response(symptoms)
+
+
+class _Flight:
+    # Chunks of one upstream answer, replayed to every caller sharing it
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.cond = threading.Condition()
+
+    def feed(self, chunk):
+        with self.cond:
+            self.chunks.append(chunk)
+            self.cond.notify_all()
+
+    def finish(self, error=None):
+        with self.cond:
+            self.done = True
+            self.error = error
+            self.cond.notify_all()
+
+    def __iter__(self):
+        seen = 0
+        while True:
+            with self.cond:
+                while seen == len(self.chunks) and not self.done:
+                    self.cond.wait()
+                new = self.chunks[seen:]
+                done, error = self.done, self.error
+            seen += len(new)
+            yield from new
+            if done and seen == len(self.chunks):
+                if error is not None:
+                    raise error
+                return
+
+
+class SingleFlight:
+    """
+    Coalesce identical in-flight requests onto one upstream call.
+
+    The upstream stream is read on its own thread into a buffer, so it
+    runs to completion even if the caller that started it goes away (e.g.
+    a Streamlit rerun); every caller with the same key replays the buffer
+    from the start and then follows it live.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def stream(self, key, produce):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if leader:
+            threading.Thread(target=self._run, args=(key, flight, produce), daemon=True).start()
+        else:
+            metrics.increment('healthmate_llm_coalesced_total')
+        return iter(flight)
+
+    def _run(self, key, flight, produce):
+        try:
+            for chunk in produce():
+                flight.feed(chunk)
+        except Exception as e:
+            flight.finish(e)
+        else:
+            flight.finish()
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+
+
+class OpenAIBackend(Backend):
+    """
+    Streaming client for an OpenAI-compatible /chat/completions endpoint.
+
+    Requests go through one keep-alive requests.Session, so consecutive
+    answers reuse open connections instead of paying TCP and TLS setup.
+    The knowledge base's advice for the detected symptoms is sent along as
+    reference, and the usual disclaimer is appended to every answer.
+    """
+
+    name = 'openai'
+
+    def __init__(self, base_url, model, api_key=None, timeout=TIMEOUT, max_connections=MAX_CONNECTIONS):
+        self.url = base_url.rstrip('/') + '/chat/completions'
+        self.model = model
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if api_key:
+            self.session.headers['Authorization'] = f"Bearer {api_key}"
+        self._flights = SingleFlight()
+        self._upstream = metrics.function_metrics('llm.OpenAIBackend.upstream')
+        self._first_token = metrics.function_metrics('llm.OpenAIBackend.first_token')
+
+    @property
+    def tag(self):
+        return f"{self.name}:{self.model}@{self.url}"
+
+    def _messages(self, prompt, symptoms):
+        system = SYSTEM_PROMPT
+        if symptoms:
+            system += "\n\nReference advice:\n\n" + render_sections(symptoms)
+        return [{'role': 'system', 'content': system}, {'role': 'user', 'content': prompt}]
+
+    def _request(self, messages):
+        clock = time.perf_counter
+        start = clock()
+        first = True
+        try:
+            with self.session.post(self.url, json={'model': self.model, 'messages': messages, 'stream': True},
+                                   stream=True, timeout=self.timeout) as response:
+                response.raise_for_status()
+                response.encoding = 'utf-8'
+                # Server-sent events: "data: {json}" lines, then "data: [DONE]"
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line.startswith('data:'):
+                        continue
+                    data = line[5:].strip()
+                    if data == '[DONE]':
+                        # Read on to the end of the body rather than break, or the
+                        # connection is dropped instead of going back to the pool
+                        continue
+                    choices = json.loads(data).get('choices') or [{}]
+                    content = (choices[0].get('delta') or {}).get('content')
+                    if content:
+                        if first:
+                            self._first_token.observe(clock() - start)
+                            first = False
+                        yield content
+        except (requests.RequestException, ValueError, KeyError) as e:
+            self._upstream.observe(clock() - start, True)
+            raise BackendError(f"LLM request failed: {e}") from e
+        self._upstream.observe(clock() - start)
+
+    def stream(self, prompt, symptoms):
+        messages = self._messages(prompt, symptoms)
+        key = json.dumps(messages, sort_keys=True)
+        yield from self._flights.stream(key, lambda: self._request(messages))
+        yield "\n\n" + FOOTER
+
+
+@lru_cache(maxsize=1)
+def get_backend():
+    """The backend selected by HEALTHMATE_LLM_BACKEND, built once per process."""
+    kind = os.environ.get('HEALTHMATE_LLM_BACKEND', 'template')
+    if kind == 'template':
+        return TemplateBackend()
+    if kind == 'openai':
+        return OpenAIBackend(
+            os.environ.get('HEALTHMATE_LLM_BASE_URL', 'https://api.openai.com/v1'),
+            os.environ.get('HEALTHMATE_LLM_MODEL', 'gpt-4o-mini'),
+            api_key=os.environ.get('HEALTHMATE_LLM_API_KEY') or os.environ.get('OPENAI_API_KEY'),
+        )
+    raise ValueError(f"Unknown HEALTHMATE_LLM_BACKEND: {kind!r}")
@@ -0,0 +1,327 @@
+"""
+Per-function latency metrics and a slow-query log.
+
+    @instrumented
+    def get_chat_history(user_id, limit=10): ...
+
+Every instrumented function keeps a latency histogram with call and error
+counts. render() returns them in the Prometheus text format, and
+start_http_server() serves that at /metrics. HEALTHMATE_METRICS=0 turns
+instrumentation off at import time: functions are then left unwrapped.
+
+Connections opened with TimedConnection log every statement that takes
+longer than SLOW_QUERY_MS, with its query plan, to the
+'healthmate.slow_query' logger.
+"""
+import functools
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+ENABLED = os.environ.get('HEALTHMATE_METRICS', '1') != '0'
+SLOW_QUERY_MS = float(os.environ.get('HEALTHMATE_SLOW_QUERY_MS', 100))
+
+# Histogram bucket upper bounds in seconds, 10 us to 10 s
+BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+           0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_BOUNDS = np.array(BUCKETS)
+
+slow_query_log = logging.getLogger('healthmate.slow_query')
+
+
+class FunctionMetrics:
+    """
+    Latency histogram plus call and error counts for one function.
+
+    Calls only append their duration to a deque (atomic, no lock); the
+    samples are bucketed in batches by fold(), which runs when the deque
+    fills up and before every read.
+    """
+
+    FOLD_AT = 4096
+
+    def __init__(self, name):
+        self.name = name
+        self.pending = deque()
+        self.counts = np.zeros(len(BUCKETS) + 1, dtype=np.int64)  # last bucket is +Inf
+        self.total = 0.0
+        self.calls = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, error=False):
+        self.pending.append(seconds)
+        if error:
+            with self._lock:
+                self.errors += 1
+        if len(self.pending) >= self.FOLD_AT:
+            self.fold()
+
+    def fold(self):
+        with self._lock:
+            # Pop exactly the samples present now; appends racing with
+            # this land on the right and wait for the next fold
+            n = len(self.pending)
+            if not n:
+                return
+            popleft = self.pending.popleft
+            samples = np.fromiter((popleft() for _ in range(n)), float, n)
+            # side='left': a sample equal to a bound counts in that bucket (le)
+            self.counts += np.bincount(np.searchsorted(_BOUNDS, samples), minlength=len(self.counts))
+            self.total += float(samples.sum())
+            self.calls += n
+
+    def read(self):
+        """(counts, total, calls, errors) with every pending sample folded in."""
+        self.fold()
+        with self._lock:
+            return self.counts.tolist(), self.total, self.calls, self.errors
+
+    def quantile(self, q):
+        # Linear interpolation inside the bucket, like Prometheus' histogram_quantile
+        counts, _, calls, _ = self.read()
+        if not calls:
+            return None
+        rank = q * calls
+        seen = 0
+        for i, count in enumerate(counts):
+            if seen + count >= rank and count:
+                if i == len(BUCKETS):
+                    return BUCKETS[-1]
+                lower = BUCKETS[i - 1] if i else 0.0
+                return lower + (BUCKETS[i] - lower) * (rank - seen) / count
+            seen += count
+        return BUCKETS[-1]
+
+
+_functions = {}
+_counters = {}
+_COUNTER_HELP = {
+    'healthmate_slow_queries_total': "Statements slower than HEALTHMATE_SLOW_QUERY_MS.",
+}
+_collectors = []
+_registry_lock = threading.Lock()
+
+
+def function_metrics(name):
+    with _registry_lock:
+        metric = _functions.get(name)
+        if metric is None:
+            metric = _functions[name] = FunctionMetrics(name)
+        return metric
+
+
+def increment(name, amount=1):
+    # Process-wide counters, e.g. slow queries
+    with _registry_lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def register_collector(collect):
+    """collect() returns (name, help, type, value) tuples, read at render time."""
+    _collectors.append(collect)
+
+
+def instrumented(func):
+    """Record latency, calls and errors of func under 'module.name'."""
+    if not ENABLED:
+        return func
+    metric = function_metrics(f"{func.__module__}.{func.__qualname__}")
+    clock = time.perf_counter
+    pending = metric.pending
+    fold_at = metric.FOLD_AT
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            metric.observe(clock() - start, True)
+            raise
+        # Inlined observe() for the common case: one deque append
+        pending.append(clock() - start)
+        if len(pending) >= fold_at:
+            metric.fold()
+        return result
+    return wrapper
+
+
+def instrumented_stream(func):
+    """
+    instrumented for a generator function: one observation per stream,
+    from the first chunk being asked for until the generator is exhausted,
+    fails, or is closed early by its consumer.
+    """
+    if not ENABLED:
+        return func
+    metric = function_metrics(f"{func.__module__}.{func.__qualname__}")
+    clock = time.perf_counter
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+            yield from func(*args, **kwargs)
+        except GeneratorExit:
+            metric.observe(clock() - start)
+            raise
+        except BaseException:
+            metric.observe(clock() - start, True)
+            raise
+        metric.observe(clock() - start)
+    return wrapper
+
+
+def snapshot():
+    """One dict per function, for tables: calls, errors, mean and quantiles in ms."""
+    with _registry_lock:
+        metrics = sorted(_functions.values(), key=lambda m: m.name)
+    rows = []
+    for m in metrics:
+        _, total, calls, errors = m.read()
+        if not calls:
+            continue
+        rows.append({
+            'function': m.name,
+            'calls': calls,
+            'errors': errors,
+            'mean_ms': total / calls * 1e3,
+            'p50_ms': m.quantile(0.5) * 1e3,
+            'p99_ms': m.quantile(0.99) * 1e3,
+        })
+    return rows
+
+
+def counters():
+    with _registry_lock:
+        values = dict(_counters)
+    for collect in _collectors:
+        for name, _, _, value in collect():
+            values[name] = value
+    return values
+
+
+def _format(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    with _registry_lock:
+        metrics = sorted(_functions.values(), key=lambda m: m.name)
+        plain = sorted(_counters.items())
+
+    lines = [
+        "# HELP healthmate_function_calls_total Calls per instrumented function.",
+        "# TYPE healthmate_function_calls_total counter",
+    ]
+    snapshots = [(m.name, *m.read()) for m in metrics]
+    lines.extend(f'healthmate_function_calls_total{{function="{name}"}} {calls}'
+                 for name, _, _, calls, _ in snapshots)
+    lines += [
+        "# HELP healthmate_function_errors_total Calls that raised, per instrumented function.",
+        "# TYPE healthmate_function_errors_total counter",
+    ]
+    lines.extend(f'healthmate_function_errors_total{{function="{name}"}} {errors}'
+                 for name, _, _, _, errors in snapshots)
+    lines += [
+        "# HELP healthmate_function_duration_seconds Latency per instrumented function.",
+        "# TYPE healthmate_function_duration_seconds histogram",
+    ]
+    for name, counts, total, calls, _ in snapshots:
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ('+Inf',), counts):
+            cumulative += count
+            lines.append(f'healthmate_function_duration_seconds_bucket{{function="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'healthmate_function_duration_seconds_sum{{function="{name}"}} {total!r}')
+        lines.append(f'healthmate_function_duration_seconds_count{{function="{name}"}} {calls}')
+
+    for name, value in plain:
+        if name in _COUNTER_HELP:
+            lines.append(f"# HELP {name} {_COUNTER_HELP[name]}")
+        lines += [f"# TYPE {name} counter", f"{name} {_format(value)}"]
+    for collect in _collectors:
+        for name, help_text, kind, value in collect():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {_format(value)}"]
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_http_server(port, addr='127.0.0.1'):
+    """Serve /metrics on a daemon thread; later calls return the running server."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((addr, port), _Handler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name='healthmate-metrics', daemon=True).start()
+        return _server
+
+
+# Statements worth an EXPLAIN QUERY PLAN when slow
+_EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+class TimedConnection(sqlite3.Connection):
+    """
+    sqlite3 connection that logs statements slower than SLOW_QUERY_MS.
+
+    The time measured is execute() itself: SQLite runs a query up to its
+    first row there, which includes the seek and any sort. Rows fetched
+    afterwards are not included.
+    """
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        cursor = super().execute(sql, parameters)
+        elapsed = time.perf_counter() - start
+        if elapsed * 1e3 >= SLOW_QUERY_MS:
+            self._log_slow(sql, parameters, elapsed)
+        return cursor
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        cursor = super().executemany(sql, seq_of_parameters)
+        elapsed = time.perf_counter() - start
+        if elapsed * 1e3 >= SLOW_QUERY_MS:
+            self._log_slow(sql, None, elapsed)
+        return cursor
+
+    def _log_slow(self, sql, parameters, elapsed):
+        increment('healthmate_slow_queries_total')
+        statement = " ".join(sql.split())
+        plan = ""
+        if parameters is not None and statement.upper().startswith(_EXPLAINABLE):
+            try:
+                rows = super().execute("EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+                plan = "".join(f"\n    {detail}" for _, _, _, detail in rows)
+            except sqlite3.Error as e:
+                plan = f"\n    (no plan: {e})"
+        slow_query_log.warning("slow query (%.1f ms): %s%s", elapsed * 1e3, statement, plan)
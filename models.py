@@ -1,164 +1,171 @@
+import logging
 import random
+import time
 from datetime import datetime
 
+from triage import matcher, detect, detected_symptoms, is_emergency
+from knowledge_base import EMERGENCY_RESPONSE, get_advice, render_response, response_id
+import database
+import response_cache
+from metrics import instrumented, instrumented_stream
+from llm import BackendError, get_backend
+
+log = logging.getLogger(__name__)
+
+class UserProfile:
+    """
+    用户资料（只读快照，来自 user_profiles 表）
+    """
+    def __init__(self, user_id, full_name=None, date_of_birth=None, gender=None, height=None, updated_at=None):
+        self.user_id = user_id
+        self.full_name = full_name
+        self.date_of_birth = date_of_birth
+        self.gender = gender
+        self.height = height
+        self.updated_at = updated_at
+
+    @classmethod
+    def get(cls, user_id):
+        row = database.get_profile(user_id)
+        return cls(user_id, *row) if row else None
+
+class User:
+    """
+    登录用户，实现 Flask-Login 所需的接口（与 UserMixin 相同），
+    数据全部经由共享的 database 包读取
+    """
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def __init__(self, id, username, email, created_at=None):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.created_at = created_at
+
+    def get_id(self):
+        return str(self.id)
+
+    @property
+    def profile(self):
+        return UserProfile.get(self.id)
+
+    @classmethod
+    def get(cls, user_id):
+        # 供 login_manager.user_loader 使用
+        row = database.get_user(int(user_id))
+        return cls(*row) if row else None
+
+    @classmethod
+    def authenticate(cls, username, password):
+        # 密码校验（含旧哈希升级）在 database.verify_user 中完成
+        user_id = database.verify_user(username, password)
+        return cls.get(user_id) if user_id else None
+
 def get_health_advice(symptom):
     """
-    根据症状提供专业的健康建议
+    根据症状提供专业的健康建议（只读，来自 data/health_advice.json）
     """
-    advice_dict = {
-        'fever': {
-            'description': 'Fever is a common symptom that indicates your body is fighting an infection.',
-            'advice': [
-                'Stay hydrated by drinking plenty of fluids',
-                'Rest and allow your body to recover',
-                'Use over-the-counter fever reducers like acetaminophen or ibuprofen (follow dosage instructions)',
-                'Apply cool compresses to your forehead and wrists',
-                'Monitor your temperature regularly'
-            ],
-            'when_to_see_doctor': 'If fever is above 103°F (39.4°C), lasts more than 3 days, or is accompanied by severe symptoms like difficulty breathing or rash.'
-        },
-        'headache': {
-            'description': 'Headaches can have various causes including tension, dehydration, or underlying conditions.',
-            'advice': [
-                'Rest in a quiet, dark room',
-                'Apply a cold or warm compress to your forehead or neck',
-                'Stay hydrated',
-                'Practice relaxation techniques like deep breathing',
-                'Consider over-the-counter pain relievers if appropriate'
-            ],
-            'when_to_see_doctor': 'If headaches are severe, frequent, or accompanied by vision changes, confusion, or fever.'
-        },
-        'cough': {
-            'description': 'Coughing is a reflex that helps clear your airways of irritants and mucus.',
-            'advice': [
-                'Stay hydrated to thin mucus',
-                'Use a humidifier to add moisture to the air',
-                'Try honey in warm tea (for adults and children over 1 year)',
-                'Avoid irritants like smoke and strong perfumes',
-                'Elevate your head with extra pillows while sleeping'
-            ],
-            'when_to_see_doctor': 'If cough persists for more than 3 weeks, is accompanied by fever, difficulty breathing, or produces bloody mucus.'
-        },
-        'sore throat': {
-            'description': 'Sore throat is often caused by viral infections but can sometimes be bacterial.',
-            'advice': [
-                'Gargle with warm salt water',
-                'Drink warm liquids like tea with honey',
-                'Use throat lozenges or hard candy to increase saliva production',
-                'Rest your voice',
-                'Use a humidifier to add moisture to the air'
-            ],
-            'when_to_see_doctor': 'If sore throat is severe, lasts more than a week, or is accompanied by difficulty breathing or swallowing.'
-        },
-        'fatigue': {
-            'description': 'Fatigue can be caused by various factors including lack of sleep, stress, or underlying health conditions.',
-            'advice': [
-                'Ensure you get 7-9 hours of quality sleep each night',
-                'Maintain a regular sleep schedule',
-                'Stay physically active with moderate exercise',
-                'Eat a balanced diet with plenty of fruits and vegetables',
-                'Manage stress through relaxation techniques'
-            ],
-            'when_to_see_doctor': 'If fatigue is persistent, severe, or accompanied by other symptoms like weight loss or fever.'
-        },
-        'nausea': {
-            'description': 'Nausea can be caused by various factors including digestive issues, infections, or motion sickness.',
-            'advice': [
-                'Eat small, bland meals throughout the day',
-                'Avoid strong odors and spicy or fatty foods',
-                'Stay hydrated with small sips of clear fluids',
-                'Try ginger tea or ginger candies',
-                'Get plenty of fresh air'
-            ],
-            'when_to_see_doctor': 'If nausea is severe, persistent, or accompanied by vomiting, fever, or abdominal pain.'
-        }
-    }
-    
-    # 默认回复
-    default_response = {
-        'description': 'This is a general health concern.',
-        'advice': [
-            'Rest and allow your body time to recover',
-            'Stay hydrated by drinking plenty of fluids',
-            'Monitor your symptoms and seek medical attention if they worsen'
-        ],
-        'when_to_see_doctor': 'If symptoms persist for more than a few days or become severe.'
-    }
-    
-    return advice_dict.get(symptom.lower(), default_response)
+    return get_advice(symptom)
 
+@instrumented
 def ask_healthmate(user_input):
     """
     根据用户输入提供健康建议
     """
-    # 急症关键词检测
-    emergency_keywords = ['chest pain', 'difficulty breathing', 'fainting', 'severe bleeding', 'stroke', 'severe headache']
-    if any(keyword in user_input.lower() for keyword in emergency_keywords):
-        return "⚠️ Possible emergency detected! Please seek immediate medical attention. This assistant cannot handle emergencies, please call emergency services or go to the nearest hospital."
+    # 单次扫描检测所有急症和症状关键词；急症在调用任何后端之前直接返回
+    detections = detect(user_input)
+    if is_emergency(detections):
+        return EMERGENCY_RESPONSE
     
-    # 症状关键词映射
-    symptom_keywords = {
-        'fever': ['fever', 'temperature', 'hot', 'sweating'],
-        'headache': ['headache', 'head pain', 'migraine'],
-        'cough': ['cough', 'coughing', 'phlegm'],
-        'sore throat': ['sore throat', 'throat pain', 'swallowing pain'],
-        'fatigue': ['tired', 'fatigue', 'exhausted', 'low energy'],
-        'nausea': ['nausea', 'sick', 'vomit', 'queasy']
-    }
+    symptoms = tuple(detected_symptoms(detections))
+    backend = get_backend()
+    # 相同（归一化后）的问题直接复用缓存的回复
+    key = response_cache.key(backend.tag, symptoms, user_input)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
     
-    # 检测症状关键词
-    detected_symptom = None
-    for symptom, keywords in symptom_keywords.items():
-        if any(keyword in user_input.lower() for keyword in keywords):
-            detected_symptom = symptom
-            break
-    
-    # 获取建议
-    if detected_symptom:
-        advice = get_health_advice(detected_symptom)
-        
-        # 构建响应
-        response = f"**About {detected_symptom}:**\n\n{advice['description']}\n\n"
-        response += "**Recommended actions:**\n"
-        for i, item in enumerate(advice['advice'], 1):
-            response += f"{i}. {item}\n"
-        
-        response += f"\n**When to see a doctor:**\n{advice['when_to_see_doctor']}\n\n"
-    else:
-        # 通用建议
-        response = "Based on your description, here are some general health recommendations:\n\n"
-        response += "1. Rest and allow your body time to recover\n"
-        response += "2. Stay hydrated by drinking plenty of fluids\n"
-        response += "3. Eat a balanced diet with plenty of fruits and vegetables\n"
-        response += "4. Monitor your symptoms and note any changes\n"
-        response += "5. Consider over-the-counter remedies if appropriate for your symptoms\n\n"
-        response += "If your symptoms persist or worsen, it's important to consult with a healthcare professional for proper diagnosis and treatment.\n\n"
+    start = time.perf_counter()
+    try:
+        response = backend.complete(user_input, symptoms)
+    except BackendError:
+        # 模型不可用时退回预渲染的模板回复（含免责声明），不写入缓存
+        log.warning("LLM backend failed, answering from templates", exc_info=True)
+        return render_response(symptoms)
+    response_cache.put(key, response, time.perf_counter() - start)
+    return response
+
+@instrumented_stream
+def ask_healthmate_stream(user_input):
+    """
+    流式版本：逐段返回回复文本，供 st.write_stream 使用
+    """
+    detections = detect(user_input)
+    if is_emergency(detections):
+        yield EMERGENCY_RESPONSE
+        return
     
-    # 添加免责声明
-    response += "---\n"
-    response += "⚠️ **Disclaimer:** This information is for educational purposes only and is not a substitute for professional medical advice. Always consult with a healthcare provider for proper diagnosis and treatment."
+    symptoms = tuple(detected_symptoms(detections))
+    backend = get_backend()
+    key = response_cache.key(backend.tag, symptoms, user_input)
+    cached = response_cache.get(key)
+    if cached is not None:
+        yield cached
+        return
     
-    return response
+    start = time.perf_counter()
+    chunks = []
+    try:
+        for chunk in backend.stream(user_input, symptoms):
+            chunks.append(chunk)
+            yield chunk
+    except BackendError:
+        log.warning("LLM backend failed, answering from templates", exc_info=True)
+        if chunks:
+            # 已输出部分内容，补上中断说明和模板回复
+            yield "\n\n*(The answer was interrupted. Here is our standard advice instead.)*\n\n"
+        yield render_response(symptoms)
+        return
+    # 只缓存完整输出的回复
+    response_cache.put(key, "".join(chunks), time.perf_counter() - start)
+
+@instrumented
+def ask_healthmate_batch(messages):
+    """
+    批量分诊：对每条消息返回检测到的症状、急症标记和回复 ID
+    """
+    classify = matcher.classify
+    results = []
+    for message in messages:
+        emergency, symptoms = classify(message or "")
+        results.append({
+            'symptoms': list(symptoms),
+            'emergency': emergency,
+            'response_id': response_id(symptoms, emergency),
+        })
+    return results
+
+HEALTH_TIPS = (
+    "Drink enough water daily - aim for 8 glasses to stay properly hydrated.",
+    "Regular exercise is key to good health - aim for at least 150 minutes of moderate activity per week.",
+    "Eat a variety of colorful fruits and vegetables - aim for at least 5 servings daily.",
+    "Prioritize quality sleep - adults need 7-9 hours per night for optimal health.",
+    "Reduce processed foods and sugar - choose whole grains and lean proteins instead.",
+    "Manage stress levels through meditation, deep breathing, or enjoyable hobbies.",
+    "Get regular health check-ups to detect potential issues early.",
+    "Practice good posture, especially if you sit for long periods.",
+    "Use sunscreen daily, even on cloudy days, to protect your skin.",
+    "Maintain social connections - strong relationships contribute to mental wellbeing.",
+    "Take breaks from screens every hour to reduce eye strain and improve posture.",
+    "Practice mindful eating - pay attention to hunger cues and eat slowly.",
+    "Include strength training in your exercise routine at least twice a week.",
+    "Limit alcohol consumption and avoid smoking for better long-term health.",
+    "Practice gratitude daily - it can improve mental health and overall wellbeing.",
+)
 
 def generate_health_tip():
-    tips = [
-        "Drink enough water daily - aim for 8 glasses to stay properly hydrated.",
-        "Regular exercise is key to good health - aim for at least 150 minutes of moderate activity per week.",
-        "Eat a variety of colorful fruits and vegetables - aim for at least 5 servings daily.",
-        "Prioritize quality sleep - adults need 7-9 hours per night for optimal health.",
-        "Reduce processed foods and sugar - choose whole grains and lean proteins instead.",
-        "Manage stress levels through meditation, deep breathing, or enjoyable hobbies.",
-        "Get regular health check-ups to detect potential issues early.",
-        "Practice good posture, especially if you sit for long periods.",
-        "Use sunscreen daily, even on cloudy days, to protect your skin.",
-        "Maintain social connections - strong relationships contribute to mental wellbeing.",
-        "Take breaks from screens every hour to reduce eye strain and improve posture.",
-        "Practice mindful eating - pay attention to hunger cues and eat slowly.",
-        "Include strength training in your exercise routine at least twice a week.",
-        "Limit alcohol consumption and avoid smoking for better long-term health.",
-        "Practice gratitude daily - it can improve mental health and overall wellbeing."
-    ]
-    
     # 根据日期选择小贴士，确保每天相同
     day_of_year = datetime.now().timetuple().tm_yday
-    return tips[day_of_year % len(tips)]
\ No newline at end of file
+    return HEALTH_TIPS[day_of_year % len(HEALTH_TIPS)]
\ No newline at end of file
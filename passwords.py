@@ -0,0 +1,117 @@
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# scrypt cost parameters (N must be a power of two). Memory per hash is
+# about 128 * N * r bytes: 16 MB at the defaults.
+SCRYPT_N = int(os.environ.get('HEALTHMATE_SCRYPT_N', 2 ** 14))
+SCRYPT_R = int(os.environ.get('HEALTHMATE_SCRYPT_R', 8))
+SCRYPT_P = int(os.environ.get('HEALTHMATE_SCRYPT_P', 1))
+
+# Worker processes for hashing; 0 hashes inline on the calling thread
+HASH_WORKERS = int(os.environ.get('HEALTHMATE_HASH_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+# Requests allowed to wait for a worker, and how long a new one may wait
+# for a slot before it is turned away
+HASH_QUEUE_DEPTH = int(os.environ.get('HEALTHMATE_HASH_QUEUE_DEPTH', 4 * max(1, HASH_WORKERS)))
+ADMISSION_TIMEOUT = float(os.environ.get('HEALTHMATE_HASH_ADMISSION_TIMEOUT', 2.0))
+
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+
+class HashingBusyError(RuntimeError):
+    """Raised when the hashing pool is saturated; the caller should ask the user to retry."""
+
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(password, salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + 2 ** 20, dklen=KEY_BYTES)
+
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            # forkserver avoids forking the threaded web server process
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _executor = ProcessPoolExecutor(HASH_WORKERS, mp_context=multiprocessing.get_context(method))
+            _slots = threading.BoundedSemaphore(HASH_WORKERS + HASH_QUEUE_DEPTH)
+        return _executor
+
+
+def shutdown():
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
+
+
+def _run_scrypt(password, salt, n, r, p):
+    # Admission control: at most HASH_WORKERS running plus HASH_QUEUE_DEPTH
+    # waiting. Beyond that, requests fail fast instead of piling up, so
+    # login latency stays bounded under a burst.
+    if HASH_WORKERS <= 0:
+        return _scrypt(password, salt, n, r, p)
+    executor = _get_executor()
+    if not _slots.acquire(timeout=ADMISSION_TIMEOUT):
+        raise HashingBusyError("Password hashing is at capacity")
+    try:
+        return executor.submit(_scrypt, password, salt, n, r, p).result()
+    finally:
+        _slots.release()
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii')
+
+
+def hash_password(password, n=None, r=None, p=None, salt=None):
+    """Salted scrypt hash encoded as 'scrypt$n$r$p$salt$key'."""
+    n, r, p = n or SCRYPT_N, r or SCRYPT_R, p or SCRYPT_P
+    # A fixed salt is only for reproducible test data
+    salt = salt or os.urandom(SALT_BYTES)
+    key = _run_scrypt(password.encode(), salt, n, r, p)
+    return f"scrypt${n}${r}${p}${_b64(salt)}${_b64(key)}"
+
+
+# Checked against when a login names no account, so a missing user costs
+# the same scrypt work as a wrong password and usernames cannot be found
+# by timing. Its key is random bytes no password derives.
+DUMMY_HASH = (f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$"
+              f"{_b64(os.urandom(SALT_BYTES))}${_b64(os.urandom(KEY_BYTES))}")
+
+
+def _legacy_hash(password):
+    # Unsalted SHA-256 used before scrypt
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def verify_password(password, stored):
+    """
+    Check password against a stored hash.
+
+    Returns (matches, needs_rehash). needs_rehash is True for legacy
+    SHA-256 hashes and for scrypt hashes made with other cost settings.
+    """
+    if not stored:
+        return False, False
+    if not stored.startswith('scrypt$'):
+        return hmac.compare_digest(_legacy_hash(password), stored), True
+
+    try:
+        _, n, r, p, salt, key = stored.split('$')
+        n, r, p = int(n), int(r), int(p)
+        salt, key = base64.b64decode(salt), base64.b64decode(key)
+    except ValueError:
+        return False, False
+    matches = hmac.compare_digest(_run_scrypt(password.encode(), salt, n, r, p), key)
+    return matches, (n, r, p) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
@@ -0,0 +1,164 @@
+"""
+Cache of Health Q&A answers, keyed on a normalized form of the question.
+
+"I have a fever and feel hot" and "I have a FEVER, and I feel hot!" both
+normalize to "fever hot" and share one answer. Entries live in two tiers:
+an in-process LRU, and the response_cache table, which every process
+using the database shares. Entries expire after TTL seconds and are
+tagged with the knowledge base version, so editing the advice in
+data/health_advice.json invalidates them.
+
+The cache is off until enable() is called (the Health Q&A page does
+when first shown), so scripts calling ask_healthmate never touch the
+database.
+
+Template answers are deliberately never cached. TemplateBackend.tag is
+None, key() returns no key for a None tag, and get() and put() skip a
+missing key. A template answer is a dictionary lookup, already cheaper
+than a cache hit.
+
+    HEALTHMATE_RESPONSE_CACHE=0         do not enable in the app
+    HEALTHMATE_RESPONSE_CACHE_TTL       seconds, default one day
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+
+import database
+import metrics
+from knowledge_base import VERSION
+from lru import LRUCache
+from triage import EMERGENCY_KEYWORDS, SYMPTOM_KEYWORDS
+
+ENABLED = os.environ.get('HEALTHMATE_RESPONSE_CACHE', '1') != '0'
+TTL = float(os.environ.get('HEALTHMATE_RESPONSE_CACHE_TTL', 24 * 3600))
+MEMORY_SIZE = 1024
+
+_KEYWORD_WORDS = {
+    word
+    for term in EMERGENCY_KEYWORDS + tuple(t for terms in SYMPTOM_KEYWORDS.values() for t in terms)
+    for word in term.split()
+}
+
+# Words that do not change the answer. Negations are kept ("no fever" is
+# not "fever"), and so is any word that is part of a triage keyword.
+STOP_WORDS = frozenset('''
+    a an the this that these those
+    i me my myself we us our you your he him his she her they them their it its
+    m s d ll re ve
+    am is are was were be been being have has had having do does did doing
+    feel feels feeling felt get gets getting got
+    and or but so because as of at by for with about to from in on up out
+    if then there here just really very quite bit little lot also too
+    please hi hello hey thanks thank what why how when which who
+    can could would should will shall may might must
+'''.split()) - _KEYWORD_WORDS
+
+_WORD = re.compile(r'[^\W_]+')
+
+
+def normalize(text):
+    """Lowercase words of text, without punctuation or stop words."""
+    return " ".join(word for word in _WORD.findall(text.lower()) if word not in STOP_WORDS)
+
+
+class ResponseCache:
+    """
+    Two-tier answer cache. Entries are (expires_at, response, cost), where
+    cost is the seconds the answer took to produce; a hit adds cost minus
+    the lookup time to the latency saved.
+    """
+
+    def __init__(self, ttl=TTL, memory_size=MEMORY_SIZE, kb_version=VERSION):
+        self.ttl = ttl
+        self.kb_version = kb_version
+        self.memory = LRUCache(memory_size)
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.saved = 0.0
+        self._lock = threading.Lock()
+
+    def key(self, tag, symptoms, text):
+        # The backend tag and detected symptoms are part of the key, so an
+        # answer is never served for a question triage reads differently
+        raw = "\x1f".join((tag, "+".join(symptoms), normalize(text)))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key):
+        start = time.perf_counter()
+        now = time.time()
+        entry = self.memory.get(key)
+        tier = 'memory'
+        if entry is None or entry[0] <= now:
+            entry = database.get_cached_response(key, self.kb_version, now)
+            if entry is None:
+                with self._lock:
+                    self.misses += 1
+                return None
+            self.memory.put(key, entry)
+            tier = 'db'
+        saved = entry[2] - (time.perf_counter() - start)
+        with self._lock:
+            if tier == 'memory':
+                self.memory_hits += 1
+            else:
+                self.db_hits += 1
+            self.saved += saved
+        return entry[1]
+
+    def put(self, key, response, cost):
+        expires_at = time.time() + self.ttl
+        self.memory.put(key, (expires_at, response, cost))
+        database.save_cached_response(key, self.kb_version, response, cost, expires_at)
+
+
+_cache = None
+
+
+def enable(**options):
+    """Start caching answers; options are passed to ResponseCache. Also purges stale rows."""
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache(**options)
+        database.purge_response_cache(_cache.kb_version, time.time())
+    return _cache
+
+
+def disable():
+    global _cache
+    _cache = None
+
+
+# Module-level helpers for models.py; they do nothing while disabled, and
+# a None backend tag (the template backend) gets no key
+def key(tag, symptoms, text):
+    return _cache.key(tag, symptoms, text) if _cache is not None and tag is not None else None
+
+
+def get(key):
+    return _cache.get(key) if key is not None and _cache is not None else None
+
+
+def put(key, response, cost):
+    if key is not None and _cache is not None:
+        _cache.put(key, response, cost)
+
+
+def _cache_metrics():
+    cache = _cache
+    memory_hits, db_hits, misses, saved = (
+        (cache.memory_hits, cache.db_hits, cache.misses, cache.saved) if cache is not None else (0, 0, 0, 0.0)
+    )
+    lookups = memory_hits + db_hits + misses
+    yield ('healthmate_response_cache_memory_hits_total', "Answers served from the in-process cache.", 'counter', memory_hits)
+    yield ('healthmate_response_cache_db_hits_total', "Answers served from the shared response_cache table.", 'counter', db_hits)
+    yield ('healthmate_response_cache_misses_total', "Answers that had to be produced.", 'counter', misses)
+    yield ('healthmate_response_cache_hit_ratio', "Share of lookups served from either tier.", 'gauge',
+           (memory_hits + db_hits) / lookups if lookups else 0.0)
+    yield ('healthmate_response_cache_saved_seconds_total',
+           "Time the cached answers originally took, minus the lookups that served them.", 'counter', saved)
+
+metrics.register_collector(_cache_metrics)
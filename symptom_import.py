@@ -0,0 +1,240 @@
+"""
+Bulk import of symptom records from other trackers.
+
+    for progress in import_symptom_file(user_id, open('export.csv', 'rb'), 'export.csv'):
+        print(progress.read, progress.imported, progress.rejected)
+
+Accepts CSV, JSON Lines, or a JSON array of objects. Columns are matched
+by name, with the usual aliases from tracker and wearable exports
+("date", "value", "note", ...). The file is read CHUNK_ROWS rows at a
+time. Each chunk is validated with pandas and numpy in a few vectorized
+passes, and its valid rows are inserted with one executemany transaction.
+Memory use depends on the chunk size, not the file size.
+
+Timestamps without a time zone are taken as UTC, like the app's own
+records. Epoch seconds and milliseconds are accepted too.
+"""
+import io
+import json
+import re
+from collections import Counter, namedtuple
+
+import numpy as np
+import pandas as pd
+
+import database
+from triage import SYMPTOM_KEYWORDS
+
+CHUNK_ROWS = 50_000
+
+# The Symptom Tracker's choices; imported names are mapped onto these, and
+# any other name is imported as OTHER with the name kept in the notes
+SYMPTOMS = ("Fever", "Headache", "Cough", "Fatigue", "Nausea", "Other")
+OTHER = "Other"
+
+# Accepted column names per field, after lowercasing
+COLUMNS = {
+    'symptom': ('symptom', 'name', 'type', 'condition', 'category'),
+    'severity': ('severity', 'intensity', 'value', 'score', 'level'),
+    'notes': ('notes', 'note', 'comment', 'comments', 'description'),
+    'recorded_at': ('recorded_at', 'timestamp', 'date', 'datetime', 'time', 'start', 'startdate', 'created_at'),
+}
+
+# Lowercase name or triage keyword -> Tracker symptom, e.g. 'tired' -> 'Fatigue'
+SYMPTOM_NAMES = {name.lower(): name for name in SYMPTOMS}
+SYMPTOM_NAMES.update({
+    term: category.capitalize()
+    for category, terms in SYMPTOM_KEYWORDS.items() if category.capitalize() in SYMPTOMS
+    for term in terms
+})
+
+# Oldest accepted timestamp; anything in the future is rejected too
+EARLIEST = pd.Timestamp('1900-01-01', tz='UTC')
+
+ImportProgress = namedtuple('ImportProgress', 'read imported rejected reasons')
+
+
+class ImportFormatError(ValueError):
+    """The file is not CSV or JSON, or has no usable columns."""
+
+
+_SEPARATOR = re.compile(r'[\s,]*')
+
+
+def _json_objects(stream, block_size=1 << 20):
+    # Objects of a top-level JSON array, decoded one by one from blocks of
+    # text, so the array never has to fit in memory
+    decoder = json.JSONDecoder()
+    buffer = stream.read(block_size).lstrip()
+    if not buffer.startswith('['):
+        raise ImportFormatError("Expected a JSON array of records")
+    position = 1
+    eof = False
+    while True:
+        position = _SEPARATOR.match(buffer, position).end()
+        if buffer.startswith(']', position):
+            return
+        try:
+            record, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise ImportFormatError("Malformed JSON array")
+            # The object runs past the buffer: drop what was decoded, read on
+            block = stream.read(block_size)
+            eof = not block
+            buffer = buffer[position:] + block
+            position = 0
+            continue
+        if not isinstance(record, dict):
+            raise ImportFormatError("Expected a JSON array of records")
+        yield record
+        position = end
+
+
+def _batches(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield pd.DataFrame.from_records(batch)
+            batch = []
+    if batch:
+        yield pd.DataFrame.from_records(batch)
+
+
+def read_chunks(file, name='', chunk_rows=CHUNK_ROWS):
+    """
+    DataFrames of at most chunk_rows raw records from a seekable CSV or
+    JSON file object, such as an open file or a Streamlit upload.
+    """
+    if isinstance(file.read(0), bytes):
+        file = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    # The first non-blank character tells a JSON array or JSON Lines from CSV
+    head = file.read(64).lstrip()[:1]
+    file.seek(0)
+    lower = name.lower()
+    if head == '[':
+        return _batches(_json_objects(file), chunk_rows)
+    if head == '{' or lower.endswith(('.jsonl', '.ndjson')):
+        return pd.read_json(file, lines=True, chunksize=chunk_rows, dtype=False, convert_dates=False)
+    if lower.endswith('.json'):
+        raise ImportFormatError("Expected JSON records")
+    return pd.read_csv(file, chunksize=chunk_rows, dtype=str, keep_default_na=False, skipinitialspace=True)
+
+
+def _column(frame, field):
+    columns = {str(column).strip().lower().replace(' ', '_'): column for column in frame.columns}
+    for alias in COLUMNS[field]:
+        if alias in columns:
+            return frame[columns[alias]]
+    return None
+
+
+def _by_value(values, convert):
+    # convert() applied once per distinct value; symptom names and
+    # severities repeat on almost every row
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    return np.asarray(convert(uniques))[codes]
+
+
+def _timestamps(values):
+    # UTC timestamps, NaT where unparseable. Numbers are epoch seconds, or
+    # milliseconds when too large to be seconds.
+    when = pd.to_datetime(values.astype(str), utc=True, errors='coerce', format='ISO8601')
+    unparsed = when.isna().to_numpy()
+    if unparsed.any():
+        numeric = pd.to_numeric(values[unparsed], errors='coerce')
+        unit = np.where(numeric.abs() > 1e11, 1e6, 1e9)
+        when[unparsed] = pd.to_datetime(numeric * unit, utc=True, errors='coerce')
+    return when
+
+
+def _utc_text(when):
+    # 'YYYY-MM-DD HH:MM:SS', the format CURRENT_TIMESTAMP writes, so imported
+    # records sort with the app's own. Much faster than .dt.strftime().
+    seconds = when.dt.tz_localize(None).to_numpy().astype('datetime64[s]')
+    return [text.replace('T', ' ') for text in np.datetime_as_string(seconds, unit='s').tolist()]
+
+
+def _tracker_symptom(name):
+    # Tracker symptom for an imported name; None when it is blank
+    if pd.isna(name) or not str(name).strip():
+        return None
+    return SYMPTOM_NAMES.get(str(name).strip().lower(), OTHER)
+
+
+def _unlisted(name):
+    # A non-blank name the tracker has no entry for
+    return not pd.isna(name) and bool(str(name).strip()) and str(name).strip().lower() not in SYMPTOM_NAMES
+
+
+def validate(frame, now=None):
+    """
+    Split a chunk of raw records into (records, reasons): valid
+    (symptom, severity, notes, recorded_at) tuples ready for
+    database.save_symptom_records, and a Counter of rejection reasons.
+    """
+    now = now or pd.Timestamp.now(tz='UTC')
+    symptom, severity, recorded_at = (_column(frame, field) for field in ('symptom', 'severity', 'recorded_at'))
+    missing = [field for field, column in (('symptom', symptom), ('severity', severity), ('recorded_at', recorded_at))
+               if column is None]
+    if missing:
+        raise ImportFormatError(f"Missing column(s): {', '.join(missing)}")
+    notes = _column(frame, 'notes')
+
+    names = _by_value(symptom, lambda uniques: [_tracker_symptom(name) for name in uniques])
+    unlisted = _by_value(symptom, lambda uniques: [_unlisted(name) for name in uniques]).astype(bool)
+    level = _by_value(severity, lambda uniques: pd.to_numeric(uniques, errors='coerce').astype(float))
+    when = _timestamps(recorded_at)
+
+    with np.errstate(invalid='ignore'):
+        whole = (level >= 1) & (level <= 10) & (level == np.floor(level))
+    checks = (
+        ('missing symptom', pd.isna(names)),
+        ('severity not a whole number from 1 to 10', ~whole),
+        ('missing or unreadable time', when.isna().to_numpy()),
+        ('time out of range', ((when < EARLIEST) | (when > now)).to_numpy()),
+    )
+    # Each rejected row is counted once, under the first check it fails
+    rejected = np.zeros(len(frame), dtype=bool)
+    reasons = Counter()
+    for reason, failed in checks:
+        new = failed & ~rejected
+        if new.any():
+            reasons[reason] = int(new.sum())
+            rejected |= new
+
+    keep = ~rejected
+    notes = [''] * int(keep.sum()) if notes is None else notes[keep].fillna('').astype(str).tolist()
+    # Names imported as OTHER lead their row's notes, e.g. "Sore throat: after the gym"
+    kept_unlisted = np.flatnonzero(unlisted[keep])
+    if len(kept_unlisted):
+        original = symptom[keep].astype(str).str.strip().to_numpy()
+        for i in kept_unlisted:
+            notes[i] = f"{original[i]}: {notes[i]}" if notes[i] else original[i]
+    records = list(zip(names[keep].tolist(), level[keep].astype(int).tolist(), notes, _utc_text(when[keep])))
+    return records, reasons
+
+
+def import_symptom_file(user_id, file, name='', chunk_rows=CHUNK_ROWS):
+    """
+    Import a CSV or JSON file object for one user, yielding an
+    ImportProgress after each chunk is committed.
+    """
+    read = imported = 0
+    reasons = Counter()
+    now = pd.Timestamp.now(tz='UTC')
+    try:
+        for frame in read_chunks(file, name, chunk_rows):
+            records, rejected = validate(frame, now)
+            if records:
+                imported += database.save_symptom_records(user_id, records)
+            read += len(frame)
+            reasons.update(rejected)
+            yield ImportProgress(read, imported, sum(reasons.values()), dict(reasons))
+    # pandas raises TypeError or AttributeError for JSON Lines whose lines
+    # are not all objects
+    except (ValueError, TypeError, AttributeError, UnicodeDecodeError, pd.errors.ParserError) as e:
+        if isinstance(e, ImportFormatError):
+            raise
+        raise ImportFormatError(f"Could not read the file after {read:,} records: {e}") from e
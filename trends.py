@@ -0,0 +1,72 @@
+import numpy as np
+from collections import namedtuple
+
+# Per-symptom daily arrays over a fixed date range. count/total/peak have
+# shape (len(symptoms), len(days)); days without records hold 0 / 0 / nan.
+SymptomTrends = namedtuple('SymptomTrends', 'days symptoms count total peak')
+
+
+def build_trends(rollups, start_day, end_day):
+    """Scatter rollup rows from database.get_symptom_rollups into dense arrays."""
+    days = np.arange(np.datetime64(start_day, 'D'), np.datetime64(end_day, 'D') + 1)
+    if not rollups:
+        empty = np.zeros((0, len(days)))
+        return SymptomTrends(days, [], empty, empty, empty)
+
+    day, symptom, count, total, peak = zip(*rollups)
+    symptoms, rows = np.unique(np.array(symptom, dtype=object), return_inverse=True)
+    cols = (np.array(day, dtype='datetime64[D]') - days[0]).astype(np.int64)
+
+    shape = (len(symptoms), len(days))
+    counts = np.zeros(shape)
+    totals = np.zeros(shape)
+    peaks = np.full(shape, np.nan)
+    # (symptom, day) pairs are unique in the rollup table, so plain
+    # fancy-index assignment is enough
+    counts[rows, cols] = count
+    totals[rows, cols] = total
+    peaks[rows, cols] = peak
+    return SymptomTrends(days, list(symptoms), counts, totals, peaks)
+
+
+def _ratio(totals, counts):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, totals / counts, np.nan)
+
+
+def daily_mean(trends):
+    return _ratio(trends.total, trends.count)
+
+
+def rolling_mean(trends, window=7):
+    """
+    Mean severity over the trailing `window` days, weighted by record count.
+    Computed from cumulative sums, so it is O(days) whatever the window.
+    """
+    def trailing(values):
+        csum = np.cumsum(values, axis=1)
+        shifted = np.zeros_like(csum)
+        shifted[:, window:] = csum[:, :-window]
+        return csum - shifted
+
+    return _ratio(trailing(trends.total), trailing(trends.count))
+
+
+def weekly(trends):
+    """
+    Collapse daily arrays to ISO weeks (Monday start).
+    Returns (week_starts, mean, peak), each of width = number of weeks.
+    """
+    # datetime64 day 0 (1970-01-01) was a Thursday
+    weekday = (trends.days.astype(np.int64) + 3) % 7
+    starts = np.flatnonzero((weekday == 0) | (np.arange(len(trends.days)) == 0))
+    week_starts = trends.days[starts] - weekday[starts].astype('timedelta64[D]')
+    if not trends.symptoms:
+        empty = np.zeros((0, len(starts)))
+        return week_starts, empty, empty
+
+    counts = np.add.reduceat(trends.count, starts, axis=1)
+    totals = np.add.reduceat(trends.total, starts, axis=1)
+    # fmax ignores the nan of days without records
+    peaks = np.fmax.reduceat(trends.peak, starts, axis=1)
+    return week_starts, _ratio(totals, counts), peaks
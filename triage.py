@@ -0,0 +1,148 @@
+import re
+from collections import namedtuple
+
+EMERGENCY = 'emergency'
+SYMPTOM = 'symptom'
+
+# Emergency keywords
+EMERGENCY_KEYWORDS = ('chest pain', 'difficulty breathing', 'fainting', 'severe bleeding', 'stroke', 'severe headache')
+
+# Symptom keyword mapping
+SYMPTOM_KEYWORDS = {
+    'fever': ('fever', 'temperature', 'hot', 'sweating'),
+    'headache': ('headache', 'head pain', 'migraine'),
+    'cough': ('cough', 'coughing', 'phlegm'),
+    'sore throat': ('sore throat', 'throat pain', 'swallowing pain'),
+    'fatigue': ('tired', 'fatigue', 'exhausted', 'low energy'),
+    'nausea': ('nausea', 'sick', 'vomit', 'queasy'),
+}
+
+# Word endings a keyword may carry and still match: "chest pains",
+# "headaches", "vomiting", "vomited", "feverish"
+SUFFIXES = ('s', 'es', 'ing', 'ed', 'ish')
+
+# One keyword hit: kind is EMERGENCY or SYMPTOM, category is the symptom
+# name (or the keyword itself for emergencies), term is the keyword and
+# start/end index the matched word in user_input, ending included.
+Detection = namedtuple('Detection', 'kind category term start end')
+
+
+def _normalize(term):
+    # casefold, not lower: re.IGNORECASE matches by Unicode case folding,
+    # so "ſick" (long s) matches the keyword "sick" and must look it up
+    return ' '.join(term.casefold().split())
+
+
+def _trie_pattern(node):
+    # Emit a regex that shares common prefixes, e.g. "cough(?:ing)?", so the
+    # engine does one walk per input position instead of one per keyword.
+    # Optional suffixes are greedy, which makes the longest keyword win.
+    branches = []
+    for ch in sorted(key for key in node if key):
+        branches.append((r'\s+' if ch == ' ' else re.escape(ch)) + _trie_pattern(node[ch]))
+    if not branches:
+        return ''
+    if len(branches) == 1 and '' not in node:
+        return branches[0]
+    group = '(?:' + '|'.join(branches) + ')'
+    return group + '?' if '' in node else group
+
+
+class KeywordMatcher:
+    """
+    Whole-word, case-insensitive matcher over a fixed keyword vocabulary.
+
+    The vocabulary is compiled once into a single prefix-trie regex, so
+    scanning costs one pass over the input however many keywords there are.
+    Multi-word keywords match across any run of whitespace, and a keyword
+    may end in one of SUFFIXES ("chest pains" matches "chest pain").
+    """
+
+    def __init__(self, vocabulary, suffixes=SUFFIXES):
+        # vocabulary: keyword -> (kind, category)
+        self._labels = {_normalize(term): label for term, label in vocabulary.items()}
+        trie = {}
+        for term in self._labels:
+            node = trie
+            for ch in term:
+                node = node.setdefault(ch, {})
+            node[''] = {}
+        # The keyword is group 1; the ending is matched outside it
+        ending = '(?:' + '|'.join(map(re.escape, suffixes)) + ')?' if suffixes else ''
+        self._regex = re.compile(r'(?<!\w)(' + _trie_pattern(trie) + ')' + ending + r'(?!\w)', re.IGNORECASE)
+
+    def __len__(self):
+        return len(self._labels)
+
+    def finditer(self, text):
+        for match in self._regex.finditer(text):
+            term = _normalize(match.group(1))
+            kind, category = self._labels[term]
+            yield Detection(kind, category, term, match.start(), match.end())
+
+    def detect(self, text):
+        return list(self.finditer(text))
+
+    def classify(self, text):
+        """(emergency, symptoms) for text, without building Detection tuples."""
+        labels = self._labels
+        emergency = False
+        symptoms = {}
+        for term in self._regex.findall(text):
+            kind, category = labels.get(term.casefold()) or labels[_normalize(term)]
+            if kind == EMERGENCY:
+                emergency = True
+            else:
+                symptoms[category] = None
+        return emergency, tuple(symptoms)
+
+
+def build_matcher(emergency_keywords=EMERGENCY_KEYWORDS, symptom_keywords=SYMPTOM_KEYWORDS):
+    vocabulary = {}
+    for symptom, keywords in symptom_keywords.items():
+        for keyword in keywords:
+            vocabulary[keyword] = (SYMPTOM, symptom)
+    # Emergencies take precedence when a keyword appears in both tables
+    for keyword in emergency_keywords:
+        vocabulary[keyword] = (EMERGENCY, keyword)
+    return KeywordMatcher(vocabulary)
+
+
+matcher = build_matcher()
+
+
+def detect(user_input):
+    """Every emergency and symptom keyword in user_input, in order of position."""
+    return matcher.detect(user_input)
+
+
+def detected_symptoms(detections):
+    # Distinct symptom categories in order of first mention
+    return list(dict.fromkeys(d.category for d in detections if d.kind == SYMPTOM))
+
+
+def is_emergency(detections):
+    return any(d.kind == EMERGENCY for d in detections)
+
+
+if __name__ == '__main__':
+    # python triage.py: check inflected forms still trigger, including the
+    # emergencies the old substring check caught
+    examples = (
+        ("severe headaches and chest pains", True, []),
+        ("Chest pains since this morning", True, []),
+        ("I have been vomiting all night", False, ['nausea']),
+        ("my migraines are back", False, ['headache']),
+        ("feeling feverish and coughs", False, ['fever', 'cough']),
+        ("she had two strokes last year", True, []),
+        ("a photo of my homesick cat", False, []),
+        # Matched by Unicode case folding: long s, and the Kelvin sign
+        ("I feel ſick, ſtroke?", True, ['nausea']),
+        ("feeling sic\u212a", False, ['nausea']),
+    )
+    for text, emergency, symptoms in examples:
+        detections = detect(text)
+        assert is_emergency(detections) == emergency, (text, detections)
+        assert detected_symptoms(detections) == symptoms, (text, detections)
+        assert matcher.classify(text) == (emergency, tuple(symptoms)), (text, matcher.classify(text))
+    print(f"{len(examples)} examples OK")
@@ -0,0 +1,119 @@
+"""
+Re-triage an export of user messages offline.
+
+    python triage_batch.py messages.jsonl -o results.jsonl --workers 4
+    python triage_batch.py chat_export.csv --field user_message
+
+Input is JSON Lines (one object per line, or one JSON string per line) or
+CSV with a header row. Each output line is a JSON object with the record
+index, its "id" if the input had one, and the ask_healthmate_batch result.
+"""
+import argparse
+import csv
+import json
+import sys
+import threading
+import time
+from itertools import islice
+from multiprocessing import Pool
+
+from models import ask_healthmate_batch
+
+CHUNK_SIZE = 2000
+
+
+def read_messages(path, field='user_message'):
+    # Yields (record_id, message) without loading the whole file
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.csv'):
+            for row in csv.DictReader(f):
+                yield row.get('id'), row.get(field) or ''
+        else:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if isinstance(record, str):
+                    yield None, record
+                else:
+                    yield record.get('id'), record.get(field) or ''
+
+
+def _chunks(records, size):
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _triage_chunk(chunk):
+    results = ask_healthmate_batch([message for _, message in chunk])
+    return [(record_id, result) for (record_id, _), result in zip(chunk, results)]
+
+
+def run(path, out, workers=1, chunk_size=CHUNK_SIZE, field='user_message', log=sys.stderr):
+    """Stream path through the triage matcher into out; returns (count, seconds)."""
+    chunks = _chunks(read_messages(path, field), chunk_size)
+    start = last_report = time.perf_counter()
+    count = 0
+
+    def write(results):
+        nonlocal count, last_report
+        for record_id, result in results:
+            row = {'index': count}
+            if record_id is not None:
+                row['id'] = record_id
+            row.update(result)
+            out.write(json.dumps(row) + '\n')
+            count += 1
+        now = time.perf_counter()
+        if now - last_report >= 1.0:
+            last_report = now
+            print(f"\r{count} messages, {count / (now - start):,.0f} msg/s", end='', file=log)
+
+    if workers <= 1:
+        for chunk in chunks:
+            write(_triage_chunk(chunk))
+    else:
+        # Pool.imap drains its input eagerly; gate it so at most two chunks
+        # per worker are read ahead of the writer and memory stays bounded.
+        slots = threading.BoundedSemaphore(workers * 2)
+
+        def gated():
+            for chunk in chunks:
+                slots.acquire()
+                yield chunk
+
+        with Pool(workers) as pool:
+            for results in pool.imap(_triage_chunk, gated()):
+                slots.release()
+                write(results)
+
+    elapsed = time.perf_counter() - start
+    print(file=log)
+    return count, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-triage a JSONL or CSV message export.")
+    parser.add_argument('input', help="messages file (.jsonl or .csv)")
+    parser.add_argument('-o', '--output', help="results file (default: stdout)")
+    parser.add_argument('--field', default='user_message', help="message field or column name")
+    parser.add_argument('--workers', type=int, default=1, help="worker processes")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="messages per worker task")
+    args = parser.parse_args(argv)
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        count, elapsed = run(args.input, out, args.workers, args.chunk_size, args.field)
+    finally:
+        if args.output:
+            out.close()
+    rate = count / elapsed if elapsed else 0
+    print(f"Triaged {count} messages in {elapsed:.2f}s ({rate:,.0f} msg/s)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
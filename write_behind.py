@@ -0,0 +1,116 @@
+import logging
+import queue
+import threading
+import time
+from itertools import groupby
+
+logger = logging.getLogger(__name__)
+
+# Defaults: commit after 500 queued rows or 50 ms, whichever comes first
+MAX_QUEUE = 10000
+BATCH_SIZE = 500
+MAX_DELAY = 0.05
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+    Background writer that commits queued INSERTs in batches.
+
+    submit() only enqueues, so the caller does not wait on the commit. The
+    writer thread collects up to batch_size statements or waits max_delay
+    after the first one, then runs each run of identical SQL with
+    executemany inside a single transaction.
+    """
+
+    def __init__(self, db_pool, max_queue=MAX_QUEUE, batch_size=BATCH_SIZE, max_delay=MAX_DELAY):
+        self.pool = db_pool
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='healthmate-write-behind', daemon=True)
+        self._thread.start()
+
+    def submit(self, sql, params):
+        """Queue one statement; returns False when full or closed so the caller can write synchronously."""
+        if self._closed:
+            return False
+        try:
+            self._queue.put_nowait((sql, params))
+        except queue.Full:
+            return False
+        return True
+
+    def pending(self):
+        return self._queue.unfinished_tasks
+
+    def flush(self):
+        """Block until everything submitted so far is committed."""
+        if self._closed or not self._queue.unfinished_tasks:
+            return
+        # Wait for this marker only, not for the queue to drain: writes
+        # submitted after it must not hold up the caller
+        done = threading.Event()
+        self._queue.put(done)
+        while not done.wait(0.1):
+            if not self._thread.is_alive():
+                return
+
+    def close(self):
+        """Flush and stop the writer thread; used as the shutdown hook."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _collect(self):
+        # Block for the first item, then fill the batch until it is full,
+        # the delay runs out, or a flush event or the stop marker arrives.
+        batch = []
+        item = self._queue.get()
+        deadline = time.monotonic() + self.max_delay
+        while True:
+            if item is _STOP or isinstance(item, threading.Event):
+                return batch, item
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                return batch, None
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                return batch, None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                return batch, None
+
+    def _commit(self, batch):
+        try:
+            with self.pool.transaction() as conn:
+                for sql, rows in groupby(batch, key=lambda item: item[0]):
+                    conn.executemany(sql, [params for _, params in rows])
+        except Exception:
+            # One bad row must not lose the rest of the batch
+            logger.exception("Batched write failed, retrying %d rows one by one", len(batch))
+            for sql, params in batch:
+                try:
+                    with self.pool.transaction() as conn:
+                        conn.execute(sql, params)
+                except Exception:
+                    logger.exception("Dropped queued write: %s", sql)
+
+    def _run(self):
+        while True:
+            batch, marker = self._collect()
+            if batch:
+                self._commit(batch)
+            for _ in batch:
+                self._queue.task_done()
+            if marker is not None:
+                self._queue.task_done()
+            if isinstance(marker, threading.Event):
+                marker.set()
+            if marker is _STOP:
+                return